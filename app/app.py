@@ -3,16 +3,76 @@ from pathlib import Path
 import json
 import anthropic
 import os
+import tempfile
+import time
 from datetime import date
 import plotly.graph_objects as go
 import io
 from PIL import Image, ImageDraw, ImageFont
 
 
-def list_tools():
+# Tool schemas rarely change, so they are kept on disk and only revalidated with the worker
+# (by server and schema hash) once they are older than TOOLS_CACHE_TTL seconds. Lists are kept per
+# executable, server name and version, "current" holds the server each executable last reported.
+TOOLS_CACHE_PATH = Path(tempfile.gettempdir()) / "mcp_tools_cache.json"
+TOOLS_CACHE_TTL = 300
+_tools_cache = {"current": {}, "tools": {}}
+
+# Upper bound on Claude calls for one query
+MAX_AGENT_TURNS = 10
+
+# Tool results from before the last COMPACT_KEEP_TURNS turns that are longer than
+# COMPACT_MIN_CHARS are replaced by a short outline to keep later requests small.
+# The worker's agent loop compacts the same way (worker_client.py), keep the two in step.
+COMPACT_KEEP_TURNS = 2
+COMPACT_MIN_CHARS = 2000
+COMPACT_PREVIEW_CHARS = 500
+
+# Streaming mode: minimum seconds between progress updates and how much of the answer they show
+PROGRESS_INTERVAL = 0.5
+PROGRESS_MAX_CHARS = 1000
+
+
+def _load_tools_cache() -> dict:
+    if not _tools_cache["tools"] and TOOLS_CACHE_PATH.exists():
+        try:
+            stored = json.loads(TOOLS_CACHE_PATH.read_text())
+        except (OSError, ValueError):
+            stored = None
+        # Files written in another layout are ignored and replaced on the next store
+        if isinstance(stored, dict) and isinstance(stored.get("current"), dict) and isinstance(stored.get("tools"), dict):
+            _tools_cache.update(stored)
+    return _tools_cache
+
+
+def _tools_cache_key(executable_key: str, server: dict) -> str:
+    server = server or {}
+    return f"{executable_key}:{server.get('name')}:{server.get('version')}"
+
+
+def _same_server(server: dict, other: dict) -> bool:
+    server, other = server or {}, other or {}
+    return (server.get("name"), server.get("version")) == (other.get("name"), other.get("version"))
+
+
+def _store_tools_cache():
+    try:
+        TOOLS_CACHE_PATH.write_text(json.dumps(_tools_cache))
+    except OSError:
+        pass
+
+
+def list_tools(executable_key: str = "mcp"):
     """
     Retrieves a list of available tools from the MCP server.
-    
+
+    The list is cached per worker executable and server name and version, with a hash of the tool
+    schemas. Within TOOLS_CACHE_TTL the cached list is returned without a worker job; after that
+    the worker is asked whether server and hash still match and only sends new schemas if not.
+
+    Args:
+        executable_key (str): The worker executable running the MCP server
+
     Returns:
         list: A list of dictionaries containing tool information with keys:
             - name: The name of the tool
@@ -21,10 +81,17 @@ def list_tools():
     """
     from viktor.external.generic import GenericAnalysis
 
+    cache = _load_tools_cache()
+    cached = cache["tools"].get(cache["current"].get(executable_key))
+    if cached is not None and time.time() - cached["fetched_at"] < TOOLS_CACHE_TTL:
+        return cached["tools"]
+
     input_get_tools = {
         'job': 'get-tools',
         'tool_name': None,
         'tool-args': None,
+        'schema_hash': cached["schema_hash"] if cached is not None else None,
+        'server': cached["server"] if cached is not None else None,
     }
 
     # Generate the input file(s)
@@ -34,14 +101,53 @@ def list_tools():
 
     # Run the analysis and obtain the output file.
     try:
-        generic_analysis = GenericAnalysis(files=files, executable_key="mcp", output_filenames=["output.json"])
+        generic_analysis = GenericAnalysis(files=files, executable_key=executable_key, output_filenames=["output.json"])
         generic_analysis.execute(timeout=60)
         output_file = generic_analysis.get_output_file("output.json")
         response = json.loads(output_file.getvalue())
     except ConnectionError:
+        # A stale list beats the canned one
+        if cached is not None:
+            return cached["tools"]
         with open(Path(__file__).parent / "get_tools_output.json", "r") as f:
             response = json.load(f)
+        return _available_tools(response)
+
+    if response.get("not_modified") and cached is not None and _same_server(response.get("server"), cached["server"]):
+        cached.update(fetched_at=time.time(), system_prompt=response.get("system_prompt"))
+    elif response.get("not_modified"):
+        # Only valid for the server that sent it, ask again for the full list
+        cache["current"].pop(executable_key, None)
+        return list_tools(executable_key)
+    else:
+        cached = {
+            "server": response.get("server"),
+            "schema_hash": response.get("schema_hash"),
+            "fetched_at": time.time(),
+            "tools": _available_tools(response),
+            "system_prompt": response.get("system_prompt"),
+        }
+        cache_key = _tools_cache_key(executable_key, cached["server"])
+        cache["tools"][cache_key] = cached
+        cache["current"][executable_key] = cache_key
+    _store_tools_cache()
+    return cached["tools"]
+
+
+def get_system_prompt(executable_key: str = "mcp"):
+    """
+    The MCP server's system prompt for the agent loop, None when it has none.
+
+    It is sent along with the tool list and cached with it, so it costs a worker job only when
+    list_tools needs one.
+    """
+    list_tools(executable_key)
+    cache = _load_tools_cache()
+    cached = cache["tools"].get(cache["current"].get(executable_key))
+    return cached.get("system_prompt") if cached is not None else None
 
+
+def _available_tools(response: dict) -> list:
     return [{
         "name": tool["name"],
         "description": tool["description"],
@@ -83,7 +189,56 @@ def use_tool(tool_name: str, tool_args: dict):
         with open(Path(__file__).parent / "use_tool_output.json", "r") as f:
             response = json.load(f)
 
-    # remove annotations from the content items
+    return remove_annotations(response)
+
+
+def use_tools(calls: list) -> list:
+    """
+    Executes several tools in a single worker job.
+
+    Args:
+        calls (list): A list of dictionaries with keys:
+            - tool_name: The name of the tool to execute
+            - tool_args: A dictionary containing the arguments to pass to the tool
+            - id (optional): An identifier other calls can depend on, defaults to the index
+            - depends_on (optional): A list of ids of calls that must finish first
+
+    Returns:
+        list: One dictionary per call, in the same order, with either a "result" (annotations
+            removed from content items) or an "error"
+    """
+    from viktor.external.generic import GenericAnalysis
+
+    input_batch = {
+        'job': 'batch',
+        'calls': calls,
+    }
+
+    # Generate the input file(s)
+    files = [
+        ('input.json', vkt.File.from_data(json.dumps(input_batch))),
+    ]
+
+    # Run the analysis and obtain the output file.
+    try:
+        generic_analysis = GenericAnalysis(files=files, executable_key="mcp", output_filenames=["output.json"])
+        generic_analysis.execute(timeout=60)
+        output_file = generic_analysis.get_output_file("output.json")
+        results = json.loads(output_file.getvalue())["results"]
+    except ConnectionError:
+        with open(Path(__file__).parent / "use_tool_output.json", "r") as f:
+            response = json.load(f)
+        results = [{"id": str(call.get("id", i)), "tool_name": call["tool_name"], "result": response}
+                   for i, call in enumerate(calls)]
+
+    for result in results:
+        if "result" in result:
+            remove_annotations(result["result"])
+    return results
+
+
+def remove_annotations(response: dict) -> dict:
+    """Remove annotations from the content items of a tool response"""
     if "content" in response and isinstance(response["content"], list):
         for item in response["content"]:
             if isinstance(item, dict) and "annotations" in item:
@@ -91,8 +246,49 @@ def use_tool(tool_name: str, tool_args: dict):
     return response
 
 
-def process_query(query: str) -> str:
-    """Process a query using Claude and available tools"""
+def process_query(query: str, stream: bool = False) -> str:
+    """
+    Process a query using Claude and available tools.
+
+    The whole tool loop runs in the worker next to the MCP server, so a query costs a single
+    worker job. Without a worker connection the loop runs here, one job per tool call. In
+    streaming mode the loop also runs here, so partial answers and tool calls can be shown as
+    progress messages while they happen.
+    """
+    from viktor.external.generic import GenericAnalysis
+
+    if stream:
+        return process_query_locally(query, stream=True)
+
+    input_run_agent = {
+        'job': 'run-agent',
+        'query': query,
+    }
+
+    # Generate the input file(s)
+    files = [
+        ('input.json', vkt.File.from_data(json.dumps(input_run_agent))),
+    ]
+
+    # Run the analysis and obtain the output file.
+    try:
+        generic_analysis = GenericAnalysis(files=files, executable_key="mcp", output_filenames=["output.json"])
+        generic_analysis.execute(timeout=300)
+        output_file = generic_analysis.get_output_file("output.json")
+        return json.loads(output_file.getvalue())["answer"]
+    except ConnectionError:
+        return process_query_locally(query)
+
+
+def process_query_locally(query: str, stream: bool = False) -> str:
+    """
+    Process a query using Claude and available tools, with one worker job per assistant turn.
+
+    All tool calls of a turn are sent to the worker as one batch, where they run concurrently,
+    and their results go back to Claude in a single message. With stream, Claude's answer is
+    streamed and shown as progress messages together with the tools being called. Like the
+    worker's loop, it sends the server's system prompt and compacts large older tool results.
+    """
     messages = [
         {
             "role": "user",
@@ -100,65 +296,128 @@ def process_query(query: str) -> str:
         }
     ]
     
-    # Get the available tools from the MCP
+    # Get the available tools from the MCP, a cache breakpoint after the last one caches them all
     available_tools = list_tools()
+    if available_tools:
+        available_tools = available_tools[:-1] + [{**available_tools[-1], "cache_control": {"type": "ephemeral"}}]
+    system_prompt = get_system_prompt()
     
-    # Initial Claude API call
     client = anthropic.Anthropic(
         api_key=os.environ.get("ANTHROPIC_API_KEY"),
     )
-    response = client.messages.create(
-        model="claude-3-5-sonnet-20241022",
-        max_tokens=1000,
-        messages=messages,
-        tools=available_tools
-    )
 
-    # Process response and handle tool calls
     final_text = []
 
-    assistant_message_content = []
-    for content in response.content:
-        if content.type == 'text':
-            final_text.append(content.text)
-            assistant_message_content.append(content)
-        elif content.type == 'tool_use':
-            tool_name = content.name
-            tool_args = content.input
-
-            # Execute tool call
-            result = use_tool(tool_name, tool_args)
-            final_text.append(f"\n[Calling tool {tool_name} with args {tool_args}]\n")
-
-            assistant_message_content.append(content)
-            messages.append({
-                "role": "assistant",
-                "content": assistant_message_content
-            })
-            messages.append({
-                "role": "user",
-                "content": [
-                    {
-                        "type": "tool_result",
-                        "tool_use_id": content.id,
-                        "content": result["content"]
-                    }
-                ]
-            })
-
-           # Get next response from Claude
-            response = client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=1000,
-                messages=messages,
-                tools=available_tools
-            )
-
-            final_text.append(response.content[0].text)
+    for _ in range(MAX_AGENT_TURNS):
+        compact_tool_results(messages)
+        request = dict(
+            model="claude-3-5-sonnet-20241022",
+            max_tokens=1000,
+            messages=messages,
+            tools=available_tools
+        )
+        if system_prompt:
+            request["system"] = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+        if stream:
+            response = _stream_message(client, request, final_text)
+        else:
+            response = client.messages.create(**request)
+
+        tool_uses = []
+        for content in response.content:
+            if content.type == 'text':
+                final_text.append(content.text)
+            elif content.type == 'tool_use':
+                tool_uses.append(content)
+                final_text.append(f"\n[Calling tool {content.name} with args {content.input}]\n")
+
+        if not tool_uses:
+            break
+
+        # Execute the tool calls of this turn in one worker job
+        if stream:
+            vkt.progress_message(f"Running tools: {', '.join(content.name for content in tool_uses)}")
+        results = use_tools([
+            {'id': content.id, 'tool_name': content.name, 'tool_args': content.input}
+            for content in tool_uses
+        ])
+
+        tool_results = []
+        for content, result in zip(tool_uses, results):
+            if "error" in result:
+                tool_results.append({
+                    "type": "tool_result",
+                    "tool_use_id": content.id,
+                    "content": result["error"],
+                    "is_error": True
+                })
+            else:
+                tool_results.append({
+                    "type": "tool_result",
+                    "tool_use_id": content.id,
+                    "content": result["result"]["content"],
+                    "is_error": result["result"].get("isError", False)
+                })
+
+        messages.append({
+            "role": "assistant",
+            "content": response.content
+        })
+        messages.append({
+            "role": "user",
+            "content": tool_results
+        })
 
     return "\n".join(final_text)
 
 
+def summarize_tool_result(text: str) -> str:
+    """Outline a large tool result, JSON objects by their keys and list sizes"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        outline = "; ".join(
+            f"{key}: {len(value)} items" if isinstance(value, (list, dict)) else f"{key}: {json.dumps(value)}"
+            for key, value in data.items()
+        )
+    else:
+        outline = text
+    return (f"[Earlier tool result compacted from {len(text)} characters: {outline[:COMPACT_PREVIEW_CHARS]}. "
+            f"Call the tool again if the full result is needed.]")
+
+
+def compact_tool_results(messages: list, keep_turns: int = COMPACT_KEEP_TURNS):
+    """Replace large text tool results older than the last keep_turns turns by summaries"""
+    tool_turns = [m for m in messages if m["role"] == "user" and isinstance(m["content"], list)]
+    for message in tool_turns[:max(len(tool_turns) - keep_turns, 0)]:
+        for block in message["content"]:
+            content = block.get("content")
+            if isinstance(content, list) and all(item.get("type") == "text" for item in content):
+                text = "\n".join(item["text"] for item in content)
+                if len(text) > COMPACT_MIN_CHARS:
+                    block["content"] = summarize_tool_result(text)
+
+
+def _stream_message(client, request: dict, final_text: list):
+    """Stream a Claude response, showing the answer so far and tool calls as progress messages"""
+    partial = []
+    last_update = 0.0
+    with client.messages.stream(**request) as stream:
+        for event in stream:
+            if event.type == 'text':
+                partial.append(event.text)
+                # Progress messages are round-trips to the platform, don't send one per token
+                if time.time() - last_update > PROGRESS_INTERVAL:
+                    answer = "\n".join(final_text + ["".join(partial)])
+                    vkt.progress_message(answer[-PROGRESS_MAX_CHARS:])
+                    last_update = time.time()
+            elif event.type == 'content_block_start' and event.content_block.type == 'tool_use':
+                vkt.progress_message(f"Calling tool {event.content_block.name}")
+        return stream.get_final_message()
+
+
 class MyText(vkt.Text):
 
     def __init__(self, value_func, *, visible = True, flex = 100):
@@ -184,6 +443,7 @@ class Parametrization(vkt.Parametrization):
     model.text = vkt.Text("This step allows you to interact with Rhino through an MCP.")
     model.query = vkt.TextAreaField("Enter your query", default="What tools are available?", flex=50)
     model.ask = vkt.SetParamsButton('Ask', 'ask', flex=10)
+    model.stream = vkt.BooleanField('Show progress', default=False, flex=20, description="Stream the answer and tool calls while the query runs")
     model.answer = vkt.HiddenField('j')
     model.answer_title = vkt.Text("**Last answer:**")
     model.anwerblock = MyText(value_func)
@@ -205,7 +465,7 @@ class Controller(vkt.Controller):
     parametrization = Parametrization
 
     def ask(self, params, **kwargs):
-        answer = process_query(params.model.query)
+        answer = process_query(params.model.query, stream=params.model.stream)
         return vkt.SetParamsResult({'model':{'answer': answer}})
 
     @vkt.GeometryView('Model', duration_guess=4)
@@ -0,0 +1,8 @@
+from rhinomcp.rhinoscript_index import build_bundle
+
+def main():
+    """Compile static/ into the rhinoscriptsyntax bundle the server memory-maps at startup"""
+    build_bundle()
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,11 @@
 __version__ = "0.1.0"
 
 # Expose key classes and functions for easier imports
-from .server import RhinoConnection, get_rhino_connection, mcp, logger
+from .server import RhinoConnection, AsyncRhinoConnection, RhinoConnectionPool, get_rhino_connection, get_async_rhino_connection, mcp, logger
+
+from .cache import DocumentCache, DocumentHistory, document_cache, document_history
+from .columnar import columnar_batch, columnar_modifications
+from .rhinoscript_index import RhinoscriptIndex, get_rhinoscript_index
 
 from .prompts.assert_general_strategy import asset_general_strategy
 
@@ -11,6 +15,7 @@ from .tools.create_object import create_object
 from .tools.create_objects import create_objects
 from .tools.delete_object import delete_object
 from .tools.get_document_info import get_document_info
+from .tools.get_document_changes import get_document_changes
 from .tools.get_object_info import get_object_info
 from .tools.get_selected_objects_info import get_selected_objects_info
 from .tools.modify_object import modify_object
@@ -18,4 +23,4 @@ from .tools.modify_objects import modify_objects
 from .tools.execute_rhinoscript_python_code import execute_rhinoscript_python_code
 from .tools.select_objects import select_objects
 
-from .resources.rhinoscriptsyntax_resource import  get_rhinoscriptsyntax_resource
\ No newline at end of file
+from .resources.rhinoscriptsyntax_resource import  get_rhinoscriptsyntax_resource, lookup_rhinoscript_function, search_rhinoscriptsyntax
\ No newline at end of file
@@ -0,0 +1,231 @@
+"""Server-side cache for document and object queries.
+
+Agents call get_document_info before almost every action and each call makes
+Rhino serialize the whole document. Replies are cached against a document
+revision: a local modification counter that every mutating tool bumps, plus the
+addon's own revision number when it advertises the ``document_revision``
+capability. Without the addon revision, edits made directly in Rhino are only
+picked up once an entry's TTL expires. With it, object entries are dropped
+whenever the addon revision moves further than our own mutations explain.
+"""
+import json
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Optional
+
+from rhinomcp.server import logger
+
+DOCUMENT_REVISION_CAPABILITY = "document_revision"
+
+
+@dataclass
+class CacheEntry:
+    data: Dict[str, Any]
+    revision: int  # Local modification counter when the entry was fetched
+    stored_at: float
+
+
+@dataclass
+class DocumentCache:
+    max_objects: int = 1024  # LRU bound for per-object entries
+    ttl: float = 30.0  # Staleness bound when the addon reports no revision
+    revision: int = 0
+    _document: Optional[CacheEntry] = field(default=None, init=False, repr=False)
+    _objects: "OrderedDict[str, CacheEntry]" = field(default_factory=OrderedDict, init=False, repr=False)
+    _names: Dict[str, str] = field(default_factory=dict, init=False, repr=False)  # name -> id
+    _addon_revision: Any = field(default=None, init=False, repr=False)
+    _own_changes: int = field(default=0, init=False, repr=False)  # Mutations since the last addon revision
+
+    async def _sync_addon_revision(self, rhino) -> bool:
+        """Check the addon's revision and drop entries it reports as stale.
+
+        Returns True when the addon tracks revisions, in which case entries
+        do not need a TTL.
+        """
+        if DOCUMENT_REVISION_CAPABILITY not in getattr(rhino, "capabilities", ()):
+            return False
+
+        result = await rhino.send_command("get_document_revision")
+        revision = result.get("revision")
+        if revision != self._addon_revision:
+            self._document = None
+            if not self._only_own_changes(revision):
+                # Somebody edited the document in Rhino itself, we cannot tell
+                # which objects changed. Our own edits were already invalidated.
+                self._clear_objects()
+            self._addon_revision = revision
+            self._own_changes = 0
+        return True
+
+    def _only_own_changes(self, revision) -> bool:
+        """Whether our own mutations account for the move to the given addon revision.
+
+        Only numeric revisions can be compared, and each of our mutations must
+        explain at most one step. Anything else counts as an external edit.
+        """
+        previous = self._addon_revision
+        if not isinstance(revision, int) or not isinstance(previous, int):
+            return False
+        return 0 < revision - previous <= self._own_changes
+
+    def _fresh(self, entry: CacheEntry, tracked: bool) -> bool:
+        return tracked or time.monotonic() - entry.stored_at < self.ttl
+
+    async def get_document_info(self, rhino) -> Dict[str, Any]:
+        """Return the document info, from cache when the document is unchanged"""
+        tracked = await self._sync_addon_revision(rhino)
+        entry = self._document
+        if entry is not None and entry.revision == self.revision and self._fresh(entry, tracked):
+            logger.info("Serving document info from cache")
+            return entry.data
+
+        revision = self.revision
+        result = await rhino.send_command("get_document_info")
+        # A mutation finished while we were waiting, the reply may predate it
+        if revision == self.revision:
+            self._document = CacheEntry(result, revision, time.monotonic())
+        return result
+
+    async def get_object_info(self, rhino, id: str = None, name: str = None) -> Dict[str, Any]:
+        """Return the info of one object, by id or else by name, from cache when possible"""
+        tracked = await self._sync_addon_revision(rhino)
+        key = id if id is not None else self._names.get(name)
+        entry = self._objects.get(key) if key is not None else None
+        if entry is not None and self._fresh(entry, tracked):
+            self._objects.move_to_end(key)
+            logger.info(f"Serving object info for {key} from cache")
+            return entry.data
+
+        revision = self.revision
+        result = await rhino.send_command("get_object_info", {"id": id, "name": name})
+        if revision == self.revision and result.get("id") is not None:
+            self._store_object(result, revision)
+        return result
+
+    def _store_object(self, data: Dict[str, Any], revision: int):
+        object_id = str(data["id"])
+        self._objects[object_id] = CacheEntry(data, revision, time.monotonic())
+        self._objects.move_to_end(object_id)
+        if data.get("name"):
+            self._names[data["name"]] = object_id
+        while len(self._objects) > self.max_objects:
+            _, evicted = self._objects.popitem(last=False)
+            if self._names.get(evicted.data.get("name")) == str(evicted.data["id"]):
+                del self._names[evicted.data["name"]]
+
+    def _clear_objects(self):
+        self._objects.clear()
+        self._names.clear()
+
+    def _bump(self):
+        self.revision += 1
+        self._own_changes += 1
+        self._document = None
+
+    def invalidate_objects(self, ids: Iterable[Optional[str]] = (), names: Iterable[Optional[str]] = ()):
+        """Forget the given objects and the document info after they were changed"""
+        self._bump()
+        for name in names:
+            if name is None:
+                continue
+            object_id = self._names.pop(name, None)
+            if object_id is not None:
+                self._objects.pop(object_id, None)
+        for object_id in ids:
+            if object_id is None:
+                continue
+            entry = self._objects.pop(str(object_id), None)
+            if entry is not None and self._names.get(entry.data.get("name")) == str(object_id):
+                del self._names[entry.data["name"]]
+
+    def invalidate_all(self):
+        """Forget everything, for changes whose extent is unknown"""
+        self._bump()
+        self._clear_objects()
+
+
+# Global cache shared by the tools, like the global Rhino connection
+document_cache = DocumentCache()
+
+
+@dataclass
+class DocumentHistory:
+    """Fingerprints of recent document snapshots, so clients can ask for deltas.
+
+    Every distinct get_document_info result is given a revision token. Only a
+    per-object hash is kept for each revision, and the objects and layers that
+    changed since an older token are found by comparing those hashes with the
+    latest snapshot.
+    """
+    max_revisions: int = 8
+    # Distinguishes tokens of this server process from those of earlier runs
+    epoch: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    _snapshots: "OrderedDict[str, Dict[str, Dict[str, int]]]" = field(default_factory=OrderedDict, init=False, repr=False)
+    _counter: int = field(default=0, init=False, repr=False)
+    _last_source: Any = field(default=None, init=False, repr=False)
+    _last_token: Optional[str] = field(default=None, init=False, repr=False)
+
+    @staticmethod
+    def _fingerprints(items: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        return {
+            str(item.get("id", item.get("name"))): hash(json.dumps(item, sort_keys=True))
+            for item in items
+        }
+
+    def record(self, document: Dict[str, Any]) -> str:
+        """Register a document snapshot and return its revision token"""
+        # Cached replies are the same object, no need to fingerprint them again
+        if document is self._last_source and self._last_token in self._snapshots:
+            return self._last_token
+
+        snapshot = {
+            "objects": self._fingerprints(document.get("objects") or []),
+            "layers": self._fingerprints(document.get("layers") or []),
+        }
+        if self._last_token in self._snapshots and self._snapshots[self._last_token] == snapshot:
+            token = self._last_token
+        else:
+            self._counter += 1
+            token = f"{self.epoch}-{self._counter}"
+            self._snapshots[token] = snapshot
+            while len(self._snapshots) > self.max_revisions:
+                self._snapshots.popitem(last=False)
+
+        self._last_source = document
+        self._last_token = token
+        return token
+
+    def changes_since(self, since_revision: str, document: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Diff the given document against an earlier revision.
+
+        Returns None when the revision is unknown, e.g. too old or from
+        another server run, and the client needs a full snapshot instead.
+        """
+        old = self._snapshots.get(since_revision)
+        if old is None:
+            return None
+        token = self.record(document)
+        new = self._snapshots[token]
+
+        changes: Dict[str, Any] = {"since_revision": since_revision, "revision": token}
+        for kind in ("objects", "layers"):
+            old_prints, new_prints = old[kind], new[kind]
+            items = {
+                str(item.get("id", item.get("name"))): item
+                for item in document.get(kind) or []
+            }
+            changes[kind] = {
+                "added": [items[key] for key in sorted(new_prints.keys() - old_prints.keys())],
+                "modified": [
+                    items[key] for key in sorted(new_prints.keys() & old_prints.keys())
+                    if new_prints[key] != old_prints[key]
+                ],
+                "deleted": sorted(old_prints.keys() - new_prints.keys()),
+            }
+        return changes
+
+
+# Global revision history, fed by get_document_info and get_document_changes
+document_history = DocumentHistory()
@@ -0,0 +1,228 @@
+"""Compact columnar payloads for bulk geometry.
+
+Instead of one dict per object, a columnar batch stores the coordinates of all
+objects in one flat array, either as a JSON list of numbers or as a base64
+string of little-endian float64 values, with attributes shared by every object
+given once. create_objects and modify_objects accept these batches next to
+regular per-object dicts and expand them server-side.
+
+Creation batch::
+
+    {
+        "format": "columnar",
+        "type": "POLYLINE",                  # POINT, LINE, POLYLINE or CURVE
+        "encoding": "f64le-base64",          # optional, default is a plain list
+        "coordinates": "...",                # x0, y0, z0, x1, y1, z1, ...
+        "counts": [4, 4, 3],                 # points per object, POLYLINE and CURVE only
+        "names": ["a", "b", "c"],            # optional, or "name_prefix": "panel_"
+        "color": [255, 0, 0],                # optional attributes shared by all objects
+    }
+
+Modification batch::
+
+    {
+        "format": "columnar",
+        "ids": ["...", "..."],
+        "encoding": "f64le-base64",
+        "translation": "...",                # optional [x, y, z] per object
+        "rotation": "...",                   # optional [x, y, z] per object
+        "scale": "...",                      # optional [x, y, z] per object
+        "new_color": [0, 0, 255],            # optional attributes shared by all objects
+    }
+"""
+import base64
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the helpers also take plain sequences
+    np = None
+
+COLUMNAR_FORMAT = "columnar"
+ENCODING_LIST = "list"
+ENCODING_F64LE_BASE64 = "f64le-base64"
+
+# Number of points of each object, for the types with a fixed count
+POINTS_PER_OBJECT = {"POINT": 1, "LINE": 2}
+VARIABLE_POINT_TYPES = {"POLYLINE", "CURVE"}
+
+SHARED_CREATE_ATTRIBUTES = ("color", "translation", "rotation", "scale")
+SHARED_MODIFY_ATTRIBUTES = ("new_color", "visible")
+VECTOR_MODIFY_ATTRIBUTES = ("translation", "rotation", "scale")
+
+
+def is_columnar(item: Any) -> bool:
+    return isinstance(item, dict) and item.get("format") == COLUMNAR_FORMAT
+
+
+def decode_array(values: Any, encoding: str = ENCODING_LIST) -> Sequence[float]:
+    """Decode a flat array of numbers from a columnar batch"""
+    if encoding == ENCODING_LIST:
+        return values
+    if encoding == ENCODING_F64LE_BASE64:
+        decoded = array("d")
+        decoded.frombytes(base64.b64decode(values))
+        if sys.byteorder != "little":
+            decoded.byteswap()
+        return decoded
+    raise ValueError(f"Unknown columnar encoding: {encoding}")
+
+
+def encode_array(values: Any, encoding: str = ENCODING_F64LE_BASE64) -> Any:
+    """Encode a (possibly nested) array of numbers as a flat columnar array"""
+    if np is not None:
+        flat = np.ascontiguousarray(values, dtype="<f8").ravel()
+        if encoding == ENCODING_F64LE_BASE64:
+            return base64.b64encode(flat.tobytes()).decode("ascii")
+        return flat.tolist()
+
+    flat = array("d", _flatten(values))
+    if encoding == ENCODING_F64LE_BASE64:
+        if sys.byteorder != "little":
+            flat.byteswap()
+        return base64.b64encode(flat.tobytes()).decode("ascii")
+    return flat.tolist()
+
+
+def _flatten(values: Any):
+    for value in values:
+        if isinstance(value, (list, tuple)):
+            yield from _flatten(value)
+        else:
+            yield value
+
+
+def _triples(values: Sequence[float], label: str) -> List[List[float]]:
+    if len(values) % 3:
+        raise ValueError(f"{label} must hold a multiple of 3 numbers, got {len(values)}")
+    return [list(values[i:i + 3]) for i in range(0, len(values), 3)]
+
+
+def _names(batch: Dict[str, Any], count: int) -> List[Optional[str]]:
+    if "names" in batch:
+        names = batch["names"]
+        if len(names) != count:
+            raise ValueError(f"Expected {count} names, got {len(names)}")
+        return names
+    if "name_prefix" in batch:
+        return [f"{batch['name_prefix']}{i}" for i in range(count)]
+    return [None] * count
+
+
+def expand_create_batch(batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Expand a columnar creation batch into create_objects dicts"""
+    object_type = str(batch.get("type", "")).upper()
+    points = _triples(decode_array(batch["coordinates"], batch.get("encoding", ENCODING_LIST)), "coordinates")
+
+    if object_type in POINTS_PER_OBJECT:
+        per_object = POINTS_PER_OBJECT[object_type]
+        if len(points) % per_object:
+            raise ValueError(f"{object_type} batches need {per_object} points per object")
+        counts = [per_object] * (len(points) // per_object)
+    elif object_type in VARIABLE_POINT_TYPES:
+        counts = batch.get("counts")
+        if counts is None or sum(counts) != len(points):
+            raise ValueError(f"{object_type} batches need 'counts' adding up to the {len(points)} points")
+    else:
+        raise ValueError(f"Unsupported columnar type: {object_type}")
+
+    shared = {key: batch[key] for key in SHARED_CREATE_ATTRIBUTES if key in batch}
+    names = _names(batch, len(counts))
+    objects = []
+    start = 0
+    for count, name in zip(counts, names):
+        object_points = points[start:start + count]
+        start += count
+        if object_type == "POINT":
+            x, y, z = object_points[0]
+            params: Dict[str, Any] = {"x": x, "y": y, "z": z}
+        elif object_type == "LINE":
+            params = {"start": object_points[0], "end": object_points[1]}
+        else:
+            params = {"points": object_points}
+            if object_type == "CURVE" and "degree" in batch:
+                params["degree"] = batch["degree"]
+
+        obj = {"type": object_type, "params": params, **shared}
+        if name is not None:
+            obj["name"] = name
+        objects.append(obj)
+    return objects
+
+
+def expand_modify_batch(batch: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Expand a columnar modification batch into modify_objects dicts"""
+    ids = batch["ids"]
+    encoding = batch.get("encoding", ENCODING_LIST)
+    vectors = {}
+    for key in VECTOR_MODIFY_ATTRIBUTES:
+        if key in batch:
+            vectors[key] = _triples(decode_array(batch[key], encoding), key)
+            if len(vectors[key]) != len(ids):
+                raise ValueError(f"Expected {len(ids)} {key} vectors, got {len(vectors[key])}")
+
+    shared = {key: batch[key] for key in SHARED_MODIFY_ATTRIBUTES if key in batch}
+    return [
+        {"id": object_id, **shared, **{key: values[i] for key, values in vectors.items()}}
+        for i, object_id in enumerate(ids)
+    ]
+
+
+def expand_batches(items: List[Dict[str, Any]], expand) -> List[Dict[str, Any]]:
+    """Replace the columnar batches in a list by the objects they describe"""
+    if not any(is_columnar(item) for item in items):
+        return items
+    expanded: List[Dict[str, Any]] = []
+    for item in items:
+        if is_columnar(item):
+            expanded.extend(expand(item))
+        else:
+            expanded.append(item)
+    return expanded
+
+
+def columnar_batch(
+    type: str,
+    coordinates: Any,
+    counts: Optional[Sequence[int]] = None,
+    names: Optional[Sequence[str]] = None,
+    encoding: str = ENCODING_F64LE_BASE64,
+    **shared: Any,
+) -> Dict[str, Any]:
+    """Build a columnar creation batch, e.g. from an (n, 3) NumPy array of points.
+
+    Example:
+        points = np.stack([xs.ravel(), ys.ravel(), np.zeros(xs.size)], axis=1)
+        batch = columnar_batch("POINT", points, name_prefix="grid_")
+        create_objects([batch])
+    """
+    batch: Dict[str, Any] = {
+        "format": COLUMNAR_FORMAT,
+        "type": type.upper(),
+        "encoding": encoding,
+        "coordinates": encode_array(coordinates, encoding),
+        **shared,
+    }
+    if counts is not None:
+        batch["counts"] = [int(count) for count in counts]
+    if names is not None:
+        batch["names"] = list(names)
+    return batch
+
+
+def columnar_modifications(
+    ids: Sequence[str],
+    translation: Any = None,
+    rotation: Any = None,
+    scale: Any = None,
+    encoding: str = ENCODING_F64LE_BASE64,
+    **shared: Any,
+) -> Dict[str, Any]:
+    """Build a columnar modification batch from (n, 3) arrays of per-object vectors"""
+    batch: Dict[str, Any] = {"format": COLUMNAR_FORMAT, "ids": list(ids), "encoding": encoding, **shared}
+    for key, values in (("translation", translation), ("rotation", rotation), ("scale", scale)):
+        if values is not None:
+            batch[key] = encode_array(values, encoding)
+    return batch
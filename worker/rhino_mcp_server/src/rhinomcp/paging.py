@@ -0,0 +1,63 @@
+"""Filtering, field projection and cursor pagination of object lists.
+
+Large documents are browsed a page at a time, so a single tool reply stays
+bounded in size no matter how many objects the model contains.
+"""
+from typing import Any, Dict, List, Optional
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+# json.dumps separators without the whitespace that indent=2 adds to every reply
+COMPACT_SEPARATORS = (",", ":")
+
+
+def encode_cursor(revision: str, offset: int) -> str:
+    return f"{revision}:{offset}"
+
+
+def decode_cursor(cursor: str, revision: str) -> int:
+    """Return the offset of a cursor, rejecting cursors of another revision"""
+    cursor_revision, _, offset = cursor.rpartition(":")
+    if cursor_revision != revision or not offset.isdigit():
+        raise ValueError(
+            "The cursor is invalid or the document changed since it was issued, start again without a cursor"
+        )
+    return int(offset)
+
+
+def page_objects(
+    objects: List[Dict[str, Any]],
+    revision: str = "",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    layer: Optional[str] = None,
+    type: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Filter, project and slice a list of objects.
+
+    Returns the page of objects, the number of objects that matched the
+    filters and the cursor of the next page (None on the last page).
+    """
+    if layer is not None:
+        objects = [obj for obj in objects if obj.get("layer") == layer]
+    if type is not None:
+        objects = [obj for obj in objects if str(obj.get("type", "")).upper() == type.upper()]
+
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be at least 1")
+    limit = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    offset = decode_cursor(cursor, revision) if cursor else 0
+    page = objects[offset:offset + limit]
+
+    if fields:
+        # Objects are always returned with their id so they can be addressed
+        keep = set(fields) | {"id"}
+        page = [{key: value for key, value in obj.items() if key in keep} for obj in page]
+
+    end = offset + len(page)
+    return {
+        "objects": page,
+        "matched": len(objects),
+        "next_cursor": encode_cursor(revision, end) if end < len(objects) else None,
+    }
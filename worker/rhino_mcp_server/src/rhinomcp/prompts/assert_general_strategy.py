@@ -13,13 +13,14 @@ def asset_general_strategy() -> str:
 
     CREATION STRATEGY:
 
-    0. Before anything, always check the document from get_document_info().
+    0. Before anything, always check the document from get_document_info(). To refresh it later, pass its "revision" to get_document_changes() instead of fetching the whole document again.
     1. If the execute_rhinoscript_python_code() function is not able to create the objects, use the create_objects() function.
     2. If there are multiple objects, use the method create_objects() to create multiple objects at once. Do not attempt to create them one by one if they are more than 10.
     3. When including an object into document, ALWAYS make sure that the name of the object is meanful.
-    4. Try to include as many objects as possible accurately and efficiently. If the command is not able to include so many data, try to create the objects in batches.
+    4. Try to include as many objects as possible accurately and efficiently. create_objects() splits large batches into chunks itself, so pass all objects in a single call.
 
     When creating rhinoscript python code:
+    - find rhinoscriptsyntax functions with search_rhinoscriptsyntax() and check their signature with lookup_rhinoscript_function() instead of loading a whole category.
     - do not hallucinate, only use the syntax that is supported by rhinoscriptsyntax or Rhino,Geometry.
     - double check the code if any of the code is not correct, and fix it.
     """
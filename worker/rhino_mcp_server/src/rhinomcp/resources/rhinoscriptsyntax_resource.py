@@ -6,8 +6,7 @@ from pydantic import FileUrl
 import os
 from pathlib import Path
 
-# Define path to static folder
-STATIC_FOLDER = Path("./static")
+from rhinomcp.rhinoscript_index import get_rhinoscript_index
 
 
 @mcp.tool()
@@ -48,12 +47,49 @@ def get_rhinoscriptsyntax_resource(category: str) -> str:
     - view
     """
 
-    for file_path in STATIC_FOLDER.glob("*.py"):
-        if file_path.name == f"{category}.py":
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    return f.read()
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
+    try:
+        return get_rhinoscript_index().module_source(category)
+    except Exception as e:
+        print(f"Error reading {category}: {e}")
 
-                
+
+@mcp.tool()
+def lookup_rhinoscript_function(name: str) -> str:
+    """
+    Return the documentation of a single RhinoScriptsyntax function: its signature, parameters,
+    return value, an example and related functions. Prefer this over get_rhinoscriptsyntax_resource
+    when the function name is known.
+
+    Parameters:
+    - name: The function name, e.g. "AddArc3Pt" or "rs.AddArc3Pt" (case-insensitive)
+    """
+    index = get_rhinoscript_index()
+    doc = index.lookup(name)
+    if doc is None:
+        suggestions = index.close_matches(name)
+        hint = f" Did you mean: {', '.join(suggestions)}?" if suggestions else ""
+        return f"Error: RhinoScriptsyntax function {name} not found.{hint}"
+    return doc.render()
+
+
+@mcp.tool()
+def search_rhinoscriptsyntax(query: str, k: int = 10) -> str:
+    """
+    Search all RhinoScriptsyntax functions by name, description and parameters. Returns the best
+    matches, one per line with signature, category and a short description. Use
+    lookup_rhinoscript_function to get the full documentation of a hit.
+
+    Parameters:
+    - query: What to search for, e.g. "closest point on curve" or "loft surfaces"
+    - k: Maximum number of results, default 10
+    """
+    hits = get_rhinoscript_index().search(query, max(1, min(k, 50)))
+    if not hits:
+        return f"No RhinoScriptsyntax functions found for: {query}"
+    lines = []
+    for doc, score in hits:
+        snippet = " ".join(doc.summary.split())
+        if len(snippet) > 120:
+            snippet = snippet[:117] + "..."
+        lines.append(f"rs.{doc.name}({doc.signature}) [{doc.module}] - {snippet}")
+    return "\n".join(lines)
@@ -0,0 +1,401 @@
+"""Per-function index of the rhinoscriptsyntax sources in ``static/``.
+
+get_rhinoscriptsyntax_resource returns whole modules, thousands of lines for
+curve or surface. The index parses every module once with ``ast`` and keeps a
+record per public function: signature plus the Parameters, Returns, Example and
+See Also sections of its docstring, so a single function can be looked up
+without reading or sending its module.
+
+For searching, an inverted index over function names, summaries and parameter
+descriptions is built alongside and ranked with BM25. Query terms that do not
+occur in the corpus are replaced by their closest vocabulary terms.
+
+build_bundle compiles the modules, the records and the inverted index into one
+versioned SQLite file. When it is present and matches the sources, the server
+opens it read-only and memory-mapped instead of parsing, so startup is cheap,
+records are only decoded when asked for and processes share the mapped pages.
+Without it the index is built in memory as before.
+"""
+import ast
+import difflib
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from rhinomcp.server import logger
+
+# Resolved from this file, the server may be started from any working directory
+STATIC_FOLDER = Path(__file__).resolve().parents[2] / "static"
+BUNDLE_PATH = STATIC_FOLDER.parent / "rhinoscriptsyntax.sqlite"
+BUNDLE_VERSION = 1
+BUNDLE_MMAP_SIZE = 64 * 1024 * 1024
+
+# BM25 parameters, and how many times name terms count compared to description terms
+BM25_K1 = 1.2
+BM25_B = 0.75
+NAME_WEIGHT = 3
+
+TOKEN_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+DOCSTRING_SECTIONS = {
+    "Parameters:": "parameters",
+    "Returns:": "returns",
+    "Example:": "example",
+    "See Also:": "see_also",
+}
+
+
+@dataclass
+class FunctionDoc:
+    name: str
+    module: str  # rhinoscriptsyntax category, e.g. "curve"
+    signature: str
+    summary: str
+    parameters: str = ""
+    returns: str = ""
+    example: str = ""
+    see_also: List[str] = field(default_factory=list)
+
+    def render(self) -> str:
+        """Format the record like the original docstring, headed by the call signature"""
+        lines = [f"rs.{self.name}({self.signature})  [{self.module}]", self.summary]
+        for header, text in (("Parameters:", self.parameters), ("Returns:", self.returns), ("Example:", self.example)):
+            if text:
+                lines += [header, text]
+        if self.see_also:
+            lines += ["See Also:"] + [f"  {name}" for name in self.see_also]
+        return "\n".join(lines)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case terms, splitting camel case so AddArc3Pt gives add, arc, 3, pt"""
+    return [token.lower() for token in TOKEN_PATTERN.findall(text)]
+
+
+def parse_docstring(docstring: str) -> Dict[str, str]:
+    """Split a rhinoscriptsyntax docstring into its summary and sections"""
+    sections = {"summary": []}
+    current = "summary"
+    for line in docstring.splitlines():
+        header = line.strip()
+        if header in DOCSTRING_SECTIONS:
+            current = DOCSTRING_SECTIONS[header]
+            sections[current] = []
+        else:
+            sections[current].append(line.rstrip())
+    return {key: "\n".join(lines).strip("\n") for key, lines in sections.items()}
+
+
+def parse_module(path: Path) -> List[FunctionDoc]:
+    """Records for the public, documented functions of one static module"""
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    docs = []
+    for node in tree.body:
+        if not isinstance(node, ast.FunctionDef) or node.name.startswith("_"):
+            continue
+        docstring = ast.get_docstring(node)
+        if not docstring:
+            continue
+        sections = parse_docstring(docstring)
+        docs.append(FunctionDoc(
+            name=node.name,
+            module=path.stem,
+            signature=ast.unparse(node.args),
+            summary=sections["summary"].strip(),
+            parameters=sections.get("parameters", ""),
+            returns=sections.get("returns", ""),
+            example=sections.get("example", ""),
+            see_also=sections.get("see_also", "").split(),
+        ))
+    return docs
+
+
+@dataclass
+class RhinoscriptIndex:
+    functions: Dict[str, FunctionDoc] = field(default_factory=dict)  # lower-case name -> record
+    _docs: List[FunctionDoc] = field(default_factory=list, init=False, repr=False)
+    # term -> (doc, term frequency, doc length)
+    _postings: Dict[str, List[Tuple[int, int, int]]] = field(default_factory=dict, init=False, repr=False)
+    _avg_length: float = field(default=0.0, init=False, repr=False)
+    folder: Path = STATIC_FOLDER
+
+    @classmethod
+    def build(cls, folder: Path = STATIC_FOLDER) -> "RhinoscriptIndex":
+        index = cls(folder=folder)
+        for path in sorted(folder.glob("*.py")):
+            try:
+                for doc in parse_module(path):
+                    index.functions[doc.name.lower()] = doc
+            except (OSError, SyntaxError) as e:
+                logger.warning(f"Could not index {path}: {e}")
+        index._build_search_index()
+        logger.info(f"Indexed {len(index.functions)} rhinoscriptsyntax functions")
+        return index
+
+    def lookup(self, name: str) -> Optional[FunctionDoc]:
+        """Find a function by name, case-insensitive and with or without the rs. prefix"""
+        name = name.strip().rstrip("()")
+        for prefix in ("rhinoscriptsyntax.", "rs."):
+            if name.startswith(prefix):
+                name = name[len(prefix):]
+        return self.functions.get(name.lower())
+
+    def close_matches(self, name: str, n: int = 5) -> List[str]:
+        matches = difflib.get_close_matches(name.lower(), self.functions.keys(), n=n, cutoff=0.6)
+        return [self.functions[match].name for match in matches]
+
+    def module_source(self, category: str) -> Optional[str]:
+        """Full source of a static module, None when there is no such category"""
+        path = self.folder / f"{category}.py"
+        if path.parent != self.folder or not path.is_file():
+            return None
+        return path.read_text(encoding="utf-8")
+
+    def _build_search_index(self):
+        self._docs = list(self.functions.values())
+        self._postings = {}
+        lengths = []
+        for i, doc in enumerate(self._docs):
+            terms = index_terms(doc)
+            for term, tf in Counter(terms).items():
+                self._postings.setdefault(term, []).append((i, tf, len(terms)))
+            lengths.append(len(terms))
+        self._avg_length = sum(lengths) / max(len(lengths), 1)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[FunctionDoc, float]]:
+        """Best k functions for a free-text query, with their BM25 scores"""
+        postings = {}
+        for term in query_terms(query):
+            if term in self._postings:
+                postings[term] = self._postings[term]
+            elif len(term) > 2:
+                for match in difflib.get_close_matches(term, self._postings.keys(), n=2, cutoff=0.8):
+                    postings[match] = self._postings[match]
+        best = bm25(postings.values(), len(self._docs), self._avg_length, k)
+        return [(self._docs[i], score) for i, score in best]
+
+
+class BundledRhinoscriptIndex:
+    """RhinoscriptIndex served from a bundle written by build_bundle"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self._connection = connection
+        self._lock = threading.Lock()
+        meta = dict(self._query("SELECT key, value FROM meta"))
+        self._count = int(meta["count"])
+        self._avg_length = float(meta["avg_length"])
+        self._names: Optional[Dict[str, str]] = None  # Only loaded for suggestions and fuzzy search
+        self._vocabulary: Optional[List[str]] = None
+
+    @classmethod
+    def open(cls, path: Path = BUNDLE_PATH, folder: Path = STATIC_FOLDER) -> Optional["BundledRhinoscriptIndex"]:
+        """Open the bundle, None when it is missing, of another version or older than the sources
+
+        Sources are compared by name, modification time and size. Only when those changed are they
+        hashed, and a matching hash (e.g. after a fresh checkout) records the new stamps when the
+        bundle is writable.
+        """
+        if not path.is_file():
+            return None
+        try:
+            connection = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            connection.execute(f"PRAGMA mmap_size = {BUNDLE_MMAP_SIZE}")
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            meta = dict(connection.execute("SELECT key, value FROM meta WHERE key IN ('source_hash', 'source_stamps')"))
+        except sqlite3.Error as e:
+            logger.warning(f"Could not open rhinoscriptsyntax bundle {path}: {e}")
+            return None
+        if version != BUNDLE_VERSION or not cls._current(path, folder, meta):
+            logger.warning(f"Rhinoscriptsyntax bundle {path} is outdated, rebuild it with build_docs.py")
+            connection.close()
+            return None
+        return cls(connection)
+
+    @staticmethod
+    def _current(path: Path, folder: Path, meta: Dict[str, str]) -> bool:
+        # A deployment may ship the bundle without the sources, then there is nothing to compare
+        if not any(folder.glob("*.py")):
+            return True
+        stamps = source_stamps(folder)
+        if meta.get("source_stamps") == stamps:
+            return True
+        if meta.get("source_hash") != source_hash(folder):
+            return False
+        # A read-only bundle is still current, it just keeps paying for the hash at startup
+        if not os.access(path, os.W_OK):
+            return True
+        try:
+            connection = sqlite3.connect(path)
+            try:
+                with connection:
+                    connection.execute("INSERT OR REPLACE INTO meta VALUES ('source_stamps', ?)", (stamps,))
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not update rhinoscriptsyntax bundle {path}: {e}")
+        return True
+
+    def _query(self, sql: str, parameters: Iterable = ()) -> List[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, tuple(parameters)).fetchall()
+
+    def _doc(self, row: tuple) -> FunctionDoc:
+        name, module, signature, summary, parameters, returns, example, see_also = row
+        return FunctionDoc(name, module, signature, summary, parameters, returns, example, see_also.split())
+
+    @property
+    def functions(self) -> Dict[str, str]:
+        """Lower-case name -> name of every function"""
+        if self._names is None:
+            self._names = dict(self._query("SELECT lower_name, name FROM functions"))
+        return self._names
+
+    def lookup(self, name: str) -> Optional[FunctionDoc]:
+        """Find a function by name, case-insensitive and with or without the rs. prefix"""
+        name = name.strip().rstrip("()")
+        for prefix in ("rhinoscriptsyntax.", "rs."):
+            if name.startswith(prefix):
+                name = name[len(prefix):]
+        rows = self._query(f"SELECT {FUNCTION_COLUMNS} FROM functions WHERE lower_name = ?", (name.lower(),))
+        return self._doc(rows[0]) if rows else None
+
+    def close_matches(self, name: str, n: int = 5) -> List[str]:
+        matches = difflib.get_close_matches(name.lower(), self.functions.keys(), n=n, cutoff=0.6)
+        return [self.functions[match] for match in matches]
+
+    def module_source(self, category: str) -> Optional[str]:
+        """Full source of a static module, None when there is no such category"""
+        rows = self._query("SELECT source FROM modules WHERE name = ?", (category,))
+        return rows[0][0] if rows else None
+
+    def _postings(self, term: str) -> List[Tuple[int, int, int]]:
+        return self._query("SELECT doc, tf, length FROM postings WHERE term = ?", (term,))
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[FunctionDoc, float]]:
+        """Best k functions for a free-text query, with their BM25 scores"""
+        postings = {}
+        for term in query_terms(query):
+            rows = self._postings(term)
+            if rows:
+                postings[term] = rows
+            elif len(term) > 2:
+                if self._vocabulary is None:
+                    self._vocabulary = [row[0] for row in self._query("SELECT DISTINCT term FROM postings")]
+                for match in difflib.get_close_matches(term, self._vocabulary, n=2, cutoff=0.8):
+                    postings[match] = self._postings(match)
+        best = bm25(postings.values(), self._count, self._avg_length, k)
+        if not best:
+            return []
+        ids = [i for i, _ in best]
+        rows = self._query(
+            f"SELECT id, {FUNCTION_COLUMNS} FROM functions WHERE id IN ({', '.join('?' * len(ids))})", ids
+        )
+        docs = {row[0]: self._doc(row[1:]) for row in rows}
+        return [(docs[i], score) for i, score in best]
+
+
+FUNCTION_COLUMNS = "name, module, signature, summary, parameters, returns, example, see_also"
+
+
+def index_terms(doc: FunctionDoc) -> List[str]:
+    """Terms a function is found by, its name counting NAME_WEIGHT times"""
+    terms = tokenize(doc.name) * NAME_WEIGHT + [doc.name.lower()] * NAME_WEIGHT
+    return terms + tokenize(doc.summary) + tokenize(doc.parameters)
+
+
+def query_terms(query: str) -> List[str]:
+    # The whole query too, so an exact function name matches its name term
+    return list(dict.fromkeys(tokenize(query) + [query.strip().lower()]))
+
+
+def bm25(postings: Iterable[List[Tuple[int, int, int]]], count: int, avg_length: float, k: int) -> List[Tuple[int, float]]:
+    """Best k (doc, score) pairs given the postings of each query term"""
+    scores: Dict[int, float] = {}
+    for term_postings in postings:
+        idf = math.log(1 + (count - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+        for doc, tf, length in term_postings:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def source_hash(folder: Path = STATIC_FOLDER) -> str:
+    """Hash of the static modules, stored in the bundle to detect outdated bundles"""
+    digest = hashlib.sha256()
+    for path in sorted(folder.glob("*.py")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def source_stamps(folder: Path = STATIC_FOLDER) -> str:
+    """Names, modification times and sizes of the static modules, a cheap check before source_hash"""
+    stamps = []
+    for path in sorted(folder.glob("*.py")):
+        stat = path.stat()
+        stamps.append([path.name, stat.st_mtime_ns, stat.st_size])
+    return json.dumps(stamps, separators=(",", ":"))
+
+
+def build_bundle(folder: Path = STATIC_FOLDER, path: Path = BUNDLE_PATH) -> Path:
+    """Compile the static modules and their index into a SQLite bundle"""
+    index = RhinoscriptIndex.build(folder)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.unlink(missing_ok=True)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.executescript("""
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+            CREATE TABLE modules (name TEXT PRIMARY KEY, source TEXT) WITHOUT ROWID;
+            CREATE TABLE functions (
+                id INTEGER PRIMARY KEY, lower_name TEXT UNIQUE, name TEXT, module TEXT, signature TEXT,
+                summary TEXT, parameters TEXT, returns TEXT, example TEXT, see_also TEXT
+            );
+            CREATE TABLE postings (term TEXT, doc INTEGER, tf INTEGER, length INTEGER, PRIMARY KEY (term, doc)) WITHOUT ROWID;
+        """)
+        connection.execute(f"PRAGMA user_version = {BUNDLE_VERSION}")
+        connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("source_hash", source_hash(folder)),
+            ("source_stamps", source_stamps(folder)),
+            ("count", str(len(index._docs))),
+            ("avg_length", repr(index._avg_length)),
+        ])
+        connection.executemany("INSERT INTO modules VALUES (?, ?)", [
+            (module.stem, module.read_text(encoding="utf-8")) for module in sorted(folder.glob("*.py"))
+        ])
+        connection.executemany("INSERT INTO functions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+            (i, doc.name.lower(), doc.name, doc.module, doc.signature, doc.summary, doc.parameters,
+             doc.returns, doc.example, " ".join(doc.see_also))
+            for i, doc in enumerate(index._docs)
+        ])
+        connection.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", [
+            (term, doc, tf, length) for term, postings in index._postings.items() for doc, tf, length in postings
+        ])
+        connection.commit()
+        connection.execute("VACUUM")
+    finally:
+        connection.close()
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote rhinoscriptsyntax bundle {path}")
+    return path
+
+
+_rhinoscript_index = None
+_rhinoscript_index_lock = threading.Lock()
+
+
+def get_rhinoscript_index():
+    """Get the index, from the bundle when there is an up to date one, else built from the sources"""
+    global _rhinoscript_index
+    with _rhinoscript_index_lock:
+        if _rhinoscript_index is None:
+            _rhinoscript_index = BundledRhinoscriptIndex.open() or RhinoscriptIndex.build()
+        return _rhinoscript_index
@@ -2,9 +2,12 @@
 from mcp.server.fastmcp import FastMCP, Context, Image
 import socket
 import json
+import struct
 import asyncio
 import logging
-from dataclasses import dataclass
+import itertools
+import time
+from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
 from typing import AsyncIterator, Dict, Any, List
 import os
@@ -18,11 +21,36 @@ logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("RhinoMCPServer")
 
+# Wire protocol. The Rhino addon historically sends bare JSON documents with no
+# delimiter, so the only way to find the end of a reply is to try parsing it.
+# Newer addons can switch to length-prefixed frames (a 4-byte big-endian length
+# followed by the UTF-8 JSON body) after a successful negotiation handshake.
+# Framed addons may additionally agree to multiplexing: every request carries
+# an "id" that is echoed in its response, so several requests can be in flight
+# on the one socket and replies may arrive out of order.
+PROTOCOL_LEGACY = "legacy"
+PROTOCOL_LENGTH_PREFIXED = "length_prefixed"
+FRAME_HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 1 << 30  # 1 GiB, anything larger is a corrupt header
+
+def encode_frame(payload: Dict[str, Any]) -> bytes:
+    """Encode a message as a length-prefixed frame"""
+    body = json.dumps(payload).encode('utf-8')
+    return FRAME_HEADER.pack(len(body)) + body
+
 @dataclass
 class RhinoConnection:
+    """Blocking client for one request at a time, kept for scripts outside the server.
+
+    The server's tools go through AsyncRhinoConnection and RhinoConnectionPool,
+    which also multiplex requests when the addon supports it.
+    """
     host: str
     port: int
     sock: socket.socket | None = None  # Changed from 'socket' to 'sock' to avoid naming conflict
+    negotiate: bool = True  # Try to upgrade to framed messages on connect
+    protocol: str = PROTOCOL_LEGACY
+    timeout: float = 15.0  # Match the addon's timeout
     
     def connect(self) -> bool:
         """Connect to the Rhino addon socket server"""
@@ -33,11 +61,15 @@ class RhinoConnection:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.sock.connect((self.host, self.port))
             logger.info(f"Connected to Rhino at {self.host}:{self.port}")
-            return True
         except Exception as e:
             logger.error(f"Failed to connect to Rhino: {str(e)}")
             self.sock = None
             return False
+
+        self.protocol = PROTOCOL_LEGACY
+        if self.negotiate:
+            self.negotiate_protocol()
+        return self.sock is not None
     
     def disconnect(self):
         """Disconnect from the Rhino addon"""
@@ -49,12 +81,68 @@ class RhinoConnection:
             finally:
                 self.sock = None
 
-    def receive_full_response(self, sock, buffer_size=8192):
-        """Receive the complete response, potentially in multiple chunks"""
-        chunks = []
+    def negotiate_protocol(self):
+        """Ask the addon to switch to length-prefixed framing.
+
+        The request is sent in the legacy format. Addons that do not know the
+        command answer with an error and we keep using the legacy protocol.
+        """
+        if self.sock is None:
+            return
+        hello = {
+            "type": "negotiate_protocol",
+            "params": {"framing": [PROTOCOL_LENGTH_PREFIXED], "multiplex": False}
+        }
+        try:
+            self.sock.settimeout(self.timeout)
+            self.sock.sendall(json.dumps(hello).encode('utf-8'))
+            response = self.receive_full_response(self.sock)
+        except Exception as e:
+            logger.warning(f"Protocol negotiation failed, reconnecting in legacy mode: {str(e)}")
+            # The socket state is unknown after a failed handshake, start over
+            self.disconnect()
+            self.negotiate = False
+            self.connect()
+            return
+
+        result = response.get("result") or {}
+        if response.get("status") != "error" and result.get("framing") == PROTOCOL_LENGTH_PREFIXED:
+            self.protocol = PROTOCOL_LENGTH_PREFIXED
+            logger.info("Using length-prefixed framing")
+        else:
+            logger.info("Rhino addon does not support framing, using legacy protocol")
+
+    def _recv_exactly(self, sock, view: memoryview):
+        """Fill the given buffer from the socket"""
+        received = 0
+        while received < len(view):
+            n = sock.recv_into(view[received:])
+            if n == 0:
+                raise ConnectionError("Connection closed while receiving a frame")
+            received += n
+
+    def receive_frame(self, sock) -> Dict[str, Any]:
+        """Receive one length-prefixed frame into a single buffer and parse it once"""
+        header = bytearray(FRAME_HEADER.size)
+        self._recv_exactly(sock, memoryview(header))
+        (length,) = FRAME_HEADER.unpack(header)
+        if length > MAX_FRAME_SIZE:
+            raise Exception(f"Frame too large ({length} bytes)")
+
+        data = bytearray(length)
+        self._recv_exactly(sock, memoryview(data))
+        logger.info(f"Received complete frame ({length} bytes)")
+        return json.loads(data)
+
+    def receive_full_response(self, sock, buffer_size=8192) -> Dict[str, Any]:
+        """Receive and parse the complete response, potentially in multiple chunks"""
         # Use a consistent timeout value that matches the addon's timeout
-        sock.settimeout(15.0)  # Match the addon's timeout
-        
+        sock.settimeout(self.timeout)
+
+        if self.protocol == PROTOCOL_LENGTH_PREFIXED:
+            return self.receive_frame(sock)
+
+        chunks = []
         try:
             while True:
                 try:
@@ -66,14 +154,20 @@ class RhinoConnection:
                         break
                     
                     chunks.append(chunk)
+
+                    # A complete JSON object always ends with a closing brace, so
+                    # only attempt the (expensive) parse when the chunk does
+                    stripped = chunk.rstrip()
+                    if stripped and not stripped.endswith(b'}'):
+                        continue
                     
                     # Check if we've received a complete JSON object
                     try:
                         data = b''.join(chunks)
-                        json.loads(data.decode('utf-8'))
+                        response = json.loads(data)
                         # If we get here, it parsed successfully
                         logger.info(f"Received complete response ({len(data)} bytes)")
-                        return data
+                        return response
                     except json.JSONDecodeError:
                         # Incomplete JSON, continue receiving
                         continue
@@ -97,8 +191,7 @@ class RhinoConnection:
             logger.info(f"Returning data after receive completion ({len(data)} bytes)")
             try:
                 # Try to parse what we have
-                json.loads(data.decode('utf-8'))
-                return data
+                return json.loads(data)
             except json.JSONDecodeError:
                 # If we can't parse it, it's incomplete
                 raise Exception("Incomplete JSON response received")
@@ -121,48 +214,422 @@ class RhinoConnection:
 
             if self.sock is None:
                 raise Exception("Socket is not connected")
-            
-            # Send the command
-            self.sock.sendall(json.dumps(command).encode('utf-8'))
+
+            if self.protocol == PROTOCOL_LENGTH_PREFIXED:
+                self.sock.sendall(encode_frame(command))
+            else:
+                self.sock.sendall(json.dumps(command).encode('utf-8'))
             logger.info(f"Command sent, waiting for response...")
-            
-            # Set a timeout for receiving - use the same timeout as in receive_full_response
-            self.sock.settimeout(15.0)  # Match the addon's timeout
-            
-            # Receive the response using the improved receive_full_response method
-            response_data = self.receive_full_response(self.sock)
-            logger.info(f"Received {len(response_data)} bytes of data")
-            
-            response = json.loads(response_data.decode('utf-8'))
+            response = self.receive_full_response(self.sock)
             logger.info(f"Response parsed, status: {response.get('status', 'unknown')}")
-            
-            if response.get("status") == "error":
-                logger.error(f"Rhino error: {response.get('message')}")
-                raise Exception(response.get("message", "Unknown error from Rhino"))
-            
-            return response.get("result", {})
         except socket.timeout:
             logger.error("Socket timeout while waiting for response from Rhino")
-            # Don't try to reconnect here - let the get_rhino_connection handle reconnection
-            # Just invalidate the current socket so it will be recreated next time
-            self.sock = None
+            # A late reply would desynchronize the stream, so drop the socket
+            # and reconnect on the next command
+            self.disconnect()
             raise Exception("Timeout waiting for Rhino response - try simplifying your request")
         except (ConnectionError, BrokenPipeError, ConnectionResetError) as e:
             logger.error(f"Socket connection error: {str(e)}")
-            self.sock = None
+            self.disconnect()
             raise Exception(f"Connection to Rhino lost: {str(e)}")
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON response from Rhino: {str(e)}")
             # Try to log what was received
-            if 'response_data' in locals() and response_data: # type: ignore
-                logger.error(f"Raw response (first 200 bytes): {response_data[:200]}")
+            logger.error(f"Raw response (first 200 bytes): {e.doc[:200]}")
             raise Exception(f"Invalid response from Rhino: {str(e)}")
         except Exception as e:
             logger.error(f"Error communicating with Rhino: {str(e)}")
-            # Don't try to reconnect here - let the get_rhino_connection handle reconnection
-            self.sock = None
+            # Don't try to reconnect here, the next command reconnects
+            self.disconnect()
+            raise Exception(f"Communication error with Rhino: {str(e)}")
+
+        # Errors reported by the addon leave the connection usable
+        if response.get("status") == "error":
+            logger.error(f"Rhino error: {response.get('message')}")
+            raise Exception(response.get("message", "Unknown error from Rhino"))
+
+        return response.get("result", {})
+
+@dataclass
+class AsyncRhinoConnection:
+    """asyncio counterpart of RhinoConnection, speaking the same wire protocol.
+
+    Waiting for Rhino suspends only the calling coroutine, so the FastMCP event
+    loop keeps serving other requests while a long command runs.
+    """
+    host: str
+    port: int
+    negotiate: bool = True  # Try to upgrade to framed messages on connect
+    protocol: str = PROTOCOL_LEGACY
+    multiplexed: bool = False
+    timeout: float = 15.0  # Match the addon's timeout
+    reader: asyncio.StreamReader | None = None
+    writer: asyncio.StreamWriter | None = None
+    # Optional commands the addon advertised during negotiation
+    capabilities: frozenset = frozenset()
+    # Serializes request/response pairs when the addon cannot multiplex
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False, repr=False)
+    _pending: Dict[str, asyncio.Future] = field(default_factory=dict, init=False, repr=False)
+    _reader_task: asyncio.Task | None = field(default=None, init=False, repr=False)
+    _request_ids: Any = field(default_factory=itertools.count, init=False, repr=False)
+
+    @property
+    def connected(self) -> bool:
+        return self.writer is not None and not self.writer.is_closing()
+
+    async def connect(self) -> bool:
+        """Connect to the Rhino addon socket server"""
+        if self.connected:
+            return True
+
+        try:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout
+            )
+            logger.info(f"Connected to Rhino at {self.host}:{self.port}")
+        except Exception as e:
+            logger.error(f"Failed to connect to Rhino: {str(e)}")
+            self.reader = self.writer = None
+            return False
+
+        self.protocol = PROTOCOL_LEGACY
+        self.multiplexed = False
+        self.capabilities = frozenset()
+        if self.negotiate:
+            await self.negotiate_protocol()
+        if self.connected and self.multiplexed:
+            self._pending = {}
+            self._reader_task = asyncio.create_task(self._reader_loop(self.reader, self._pending))
+        return self.connected
+
+    async def disconnect(self):
+        """Disconnect from the Rhino addon"""
+        writer, self.reader, self.writer = self.writer, None, None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if writer is not None:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception as e:
+                logger.error(f"Error disconnecting from Rhino: {str(e)}")
+
+    async def negotiate_protocol(self):
+        """Ask the addon to switch to length-prefixed framing and multiplexing"""
+        hello = {
+            "type": "negotiate_protocol",
+            "params": {"framing": [PROTOCOL_LENGTH_PREFIXED], "multiplex": True}
+        }
+        try:
+            self.writer.write(json.dumps(hello).encode('utf-8'))
+            await self.writer.drain()
+            response = await self.receive_full_response()
+        except Exception as e:
+            logger.warning(f"Protocol negotiation failed, reconnecting in legacy mode: {str(e)}")
+            await self.disconnect()
+            self.negotiate = False
+            await self.connect()
+            return
+
+        result = response.get("result") or {}
+        if response.get("status") != "error" and result.get("framing") == PROTOCOL_LENGTH_PREFIXED:
+            self.protocol = PROTOCOL_LENGTH_PREFIXED
+            self.multiplexed = bool(result.get("multiplex"))
+            self.capabilities = frozenset(result.get("capabilities") or ())
+            logger.info(f"Using length-prefixed framing (multiplexed: {self.multiplexed})")
+        else:
+            logger.info("Rhino addon does not support framing, using legacy protocol")
+
+    async def receive_frame(self, reader: asyncio.StreamReader) -> Dict[str, Any]:
+        """Receive one length-prefixed frame and parse it once"""
+        header = await reader.readexactly(FRAME_HEADER.size)
+        (length,) = FRAME_HEADER.unpack(header)
+        if length > MAX_FRAME_SIZE:
+            raise Exception(f"Frame too large ({length} bytes)")
+        data = await reader.readexactly(length)
+        logger.info(f"Received complete frame ({length} bytes)")
+        return json.loads(data)
+
+    async def receive_full_response(self, buffer_size=8192) -> Dict[str, Any]:
+        """Receive and parse the complete response, potentially in multiple chunks"""
+        if self.protocol == PROTOCOL_LENGTH_PREFIXED:
+            return await asyncio.wait_for(self.receive_frame(self.reader), self.timeout)
+
+        chunks = []
+        while True:
+            try:
+                chunk = await asyncio.wait_for(self.reader.read(buffer_size), self.timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Socket timeout during chunked receive")
+                break
+            if not chunk:
+                if not chunks:
+                    raise ConnectionError("Connection closed before receiving any data")
+                break
+
+            chunks.append(chunk)
+            # See RhinoConnection.receive_full_response
+            stripped = chunk.rstrip()
+            if stripped and not stripped.endswith(b'}'):
+                continue
+            try:
+                data = b''.join(chunks)
+                response = json.loads(data)
+                logger.info(f"Received complete response ({len(data)} bytes)")
+                return response
+            except json.JSONDecodeError:
+                continue
+
+        if not chunks:
+            raise asyncio.TimeoutError()
+        try:
+            return json.loads(b''.join(chunks))
+        except json.JSONDecodeError:
+            raise Exception("Incomplete JSON response received")
+
+    async def _reader_loop(self, reader: asyncio.StreamReader, pending: Dict[str, asyncio.Future]):
+        """Read frames until the stream closes and resolve the matching futures"""
+        error: Exception = ConnectionError("Connection to Rhino closed")
+        try:
+            while True:
+                response = await self.receive_frame(reader)
+                future = pending.pop(str(response.get("id")), None)
+                if future is None or future.done():
+                    logger.warning(f"Dropping response for unknown request id: {response.get('id')}")
+                    continue
+                future.set_result(response)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if self.reader is reader:
+                logger.error(f"Reader for Rhino connection stopped: {str(e)}")
+                self._reader_task = None
+                await self.disconnect()
+            error = ConnectionError(f"Connection to Rhino lost: {str(e)}")
+        finally:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            pending.clear()
+
+    async def _send_serial(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        async with self._lock:
+            # Another caller may have dropped the connection while we waited
+            if not self.connected:
+                raise ConnectionError("Connection to Rhino closed")
+            if self.protocol == PROTOCOL_LENGTH_PREFIXED:
+                self.writer.write(encode_frame(command))
+            else:
+                self.writer.write(json.dumps(command).encode('utf-8'))
+            await self.writer.drain()
+            logger.info(f"Command sent, waiting for response...")
+            return await self.receive_full_response()
+
+    async def _send_multiplexed(self, command: Dict[str, Any]) -> Dict[str, Any]:
+        request_id = str(next(self._request_ids))
+        future = asyncio.get_running_loop().create_future()
+        pending = self._pending
+        pending[request_id] = future
+        try:
+            if not self.connected:
+                raise ConnectionError("Connection to Rhino closed")
+            # A single write call per frame, so frames never interleave
+            self.writer.write(encode_frame({**command, "id": request_id}))
+            await self.writer.drain()
+            logger.info(f"Command {request_id} sent, waiting for response...")
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            pending.pop(request_id, None)
+
+    async def send_command(self, command_type: str, params: Dict[str, Any] = {}) -> Dict[str, Any]:
+        """Send a command to Rhino and return the response"""
+        if not self.connected and not await self.connect():
+            raise ConnectionError("Not connected to Rhino")
+
+        command = {
+            "type": command_type,
+            "params": params or {}
+        }
+
+        try:
+            logger.info(f"Sending command: {command_type} with params: {params}")
+            if self.multiplexed:
+                response = await self._send_multiplexed(command)
+            else:
+                response = await self._send_serial(command)
+            logger.info(f"Response parsed, status: {response.get('status', 'unknown')}")
+        except asyncio.TimeoutError:
+            logger.error("Socket timeout while waiting for response from Rhino")
+            if not self.multiplexed:
+                await self.disconnect()
+            raise Exception("Timeout waiting for Rhino response - try simplifying your request")
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logger.error(f"Socket connection error: {str(e)}")
+            await self.disconnect()
+            raise Exception(f"Connection to Rhino lost: {str(e)}")
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid JSON response from Rhino: {str(e)}")
+            logger.error(f"Raw response (first 200 bytes): {e.doc[:200]}")
+            raise Exception(f"Invalid response from Rhino: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error communicating with Rhino: {str(e)}")
+            await self.disconnect()
             raise Exception(f"Communication error with Rhino: {str(e)}")
 
+        # Errors reported by the addon leave the connection usable
+        if response.get("status") == "error":
+            logger.error(f"Rhino error: {response.get('message')}")
+            raise Exception(response.get("message", "Unknown error from Rhino"))
+
+        return response.get("result", {})
+
+# Commands that only read the document and can safely be sent again when the
+# connection drops before their reply arrives
+IDEMPOTENT_COMMANDS = frozenset({
+    "ping",
+    "get_document_info",
+    "get_object_info",
+    "get_selected_objects_info",
+})
+
+@dataclass
+class RhinoConnectionPool:
+    """A small pool of persistent AsyncRhinoConnections to the Rhino addon.
+
+    Commands go to the healthy connection with the fewest requests in flight.
+    A background task pings idle connections and reconnects dropped ones with
+    exponential backoff, and idempotent commands are retried transparently when
+    their connection is lost.
+    """
+    host: str
+    port: int
+    size: int = 2
+    keepalive_interval: float = 30.0  # Ping connections idle for this long
+    health_check_interval: float = 5.0
+    initial_backoff: float = 0.5
+    max_backoff: float = 30.0
+    retries: int = 1  # Extra attempts for idempotent commands
+    connections: List[AsyncRhinoConnection] = field(default_factory=list, init=False)
+    _in_flight: Dict[int, int] = field(default_factory=dict, init=False, repr=False)
+    _last_used: Dict[int, float] = field(default_factory=dict, init=False, repr=False)
+    _backoff: Dict[int, float] = field(default_factory=dict, init=False, repr=False)
+    _next_attempt: Dict[int, float] = field(default_factory=dict, init=False, repr=False)
+    _health_task: asyncio.Task | None = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self.connections = [AsyncRhinoConnection(host=self.host, port=self.port) for _ in range(self.size)]
+        for index in range(self.size):
+            self._in_flight[index] = 0
+            self._last_used[index] = 0.0
+            self._backoff[index] = self.initial_backoff
+            self._next_attempt[index] = 0.0
+
+    @property
+    def connected(self) -> bool:
+        return any(connection.connected for connection in self.connections)
+
+    @property
+    def capabilities(self) -> frozenset:
+        """Optional commands supported by the addon the pool is connected to"""
+        for connection in self.connections:
+            if connection.connected:
+                return connection.capabilities
+        return frozenset()
+
+    async def start(self) -> int:
+        """Open the pool's connections and start health checks, returns the number connected"""
+        await asyncio.gather(*(self._reconnect(index) for index in range(self.size)))
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+        return sum(connection.connected for connection in self.connections)
+
+    async def close(self):
+        """Stop health checks and disconnect every connection"""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        await asyncio.gather(*(connection.disconnect() for connection in self.connections))
+
+    async def _reconnect(self, index: int) -> bool:
+        """Try to (re)connect one connection, backing off exponentially on failure"""
+        connection = self.connections[index]
+        if connection.connected:
+            return True
+        if time.monotonic() < self._next_attempt[index]:
+            return False
+
+        if await connection.connect():
+            self._backoff[index] = self.initial_backoff
+            self._next_attempt[index] = 0.0
+            self._last_used[index] = time.monotonic()
+            return True
+
+        logger.warning(f"Reconnect to Rhino failed, next attempt in {self._backoff[index]:.1f}s")
+        self._next_attempt[index] = time.monotonic() + self._backoff[index]
+        self._backoff[index] = min(self._backoff[index] * 2, self.max_backoff)
+        return False
+
+    async def _ping(self, index: int):
+        """Keep an idle connection alive and find out whether it still is"""
+        try:
+            await self.connections[index].send_command("ping")
+        except Exception:
+            # Addons without a ping command answer with an error, which still
+            # proves the connection is alive. Transport failures disconnect it.
+            pass
+        self._last_used[index] = time.monotonic()
+
+    async def _health_loop(self):
+        """Periodically ping idle connections and reconnect dropped ones"""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            now = time.monotonic()
+            checks = []
+            for index, connection in enumerate(self.connections):
+                if not connection.connected:
+                    checks.append(self._reconnect(index))
+                elif self._in_flight[index] == 0 and now - self._last_used[index] >= self.keepalive_interval:
+                    checks.append(self._ping(index))
+            try:
+                await asyncio.gather(*checks)
+            except Exception as e:
+                logger.error(f"Rhino connection health check failed: {str(e)}")
+
+    async def _acquire(self) -> int:
+        """Pick the least busy healthy connection, connecting one if none is up"""
+        healthy = [index for index, connection in enumerate(self.connections) if connection.connected]
+        if not healthy:
+            for index in range(self.size):
+                if await self._reconnect(index):
+                    healthy.append(index)
+                    break
+        if not healthy:
+            raise Exception("Could not connect to Rhino. Make sure the Rhino addon is running.")
+        return min(healthy, key=lambda index: self._in_flight[index])
+
+    async def send_command(self, command_type: str, params: Dict[str, Any] = {}) -> Dict[str, Any]:
+        """Send a command over the pool and return the response"""
+        attempts = 1 + (self.retries if command_type in IDEMPOTENT_COMMANDS else 0)
+        index = None
+        for attempt in range(attempts):
+            # Retry on a fresh socket to the same slot, the other connections in
+            # the pool were most likely dropped by the same event
+            if index is None or not await self._reconnect(index):
+                index = await self._acquire()
+            connection = self.connections[index]
+            self._in_flight[index] += 1
+            try:
+                return await connection.send_command(command_type, params)
+            except Exception as e:
+                # Errors reported by Rhino leave the connection up and are final
+                if connection.connected or attempt == attempts - 1:
+                    raise
+                logger.warning(f"Connection lost during {command_type}, retrying: {str(e)}")
+            finally:
+                self._in_flight[index] -= 1
+                self._last_used[index] = time.monotonic()
+
 @asynccontextmanager
 async def server_lifespan(server: FastMCP) -> AsyncIterator[Dict[str, Any]]:
     """Manage server startup and shutdown lifecycle"""
@@ -175,20 +642,29 @@ async def server_lifespan(server: FastMCP) -> AsyncIterator[Dict[str, Any]]:
         
         # Try to connect to Rhino on startup to verify it's available
         try:
-            # This will initialize the global connection if needed
-            rhino = get_rhino_connection()
+            # This will initialize the global connection pool if needed
+            rhino = await get_async_rhino_connection()
+            if not rhino.connected:
+                raise Exception("no connection in the pool could be opened")
             logger.info("Successfully connected to Rhino on startup")
         except Exception as e:
             logger.warning(f"Could not connect to Rhino on startup: {str(e)}")
             logger.warning("Make sure the Rhino addon is running before using Rhino resources or tools")
+
+        # Build the rhinoscriptsyntax index now rather than on the first lookup
+        from rhinomcp.rhinoscript_index import get_rhinoscript_index
+        await asyncio.to_thread(get_rhinoscript_index)
         
         # Return an empty context - we're using the global connection
         yield {}
     finally:
-        # Clean up the global connection on shutdown
-        global _rhino_connection
-        if _rhino_connection:
+        # Clean up the global connections on shutdown
+        global _rhino_connection, _rhino_pool
+        if _rhino_pool:
             logger.info("Disconnecting from Rhino on shutdown")
+            await _rhino_pool.close()
+            _rhino_pool = None
+        if _rhino_connection:
             _rhino_connection.disconnect()
             _rhino_connection = None
         logger.info("RhinoMCP server shut down")
@@ -202,11 +678,15 @@ mcp = FastMCP(
 
 # Resource endpoints
 
-# Global connection for resources (since resources can't access context)
+# Global blocking connection, only for synchronous callers outside the server's tools
+# and resources, which all use the pool below
 _rhino_connection = None
+# Global connection pool used by the (async) tools, bound to the server's event loop
+_rhino_pool = None
+_rhino_pool_lock = asyncio.Lock()
 
 def get_rhino_connection():
-    """Get or create a persistent Rhino connection"""
+    """Get or create a persistent blocking Rhino connection, for scripts that cannot await"""
     global _rhino_connection
     
     # Create a new connection if needed
@@ -220,6 +700,22 @@ def get_rhino_connection():
     
     return _rhino_connection
 
+async def get_async_rhino_connection() -> RhinoConnectionPool:
+    """Get or create the persistent pool of asyncio Rhino connections.
+
+    The pool has the same send_command interface as a single connection and
+    reconnects on its own, so it is created once and kept for the server's life.
+    """
+    global _rhino_pool
+
+    async with _rhino_pool_lock:
+        if _rhino_pool is None:
+            _rhino_pool = RhinoConnectionPool(host="127.0.0.1", port=1999)
+            connected = await _rhino_pool.start()
+            logger.info(f"Created Rhino connection pool ({connected}/{_rhino_pool.size} connected)")
+
+    return _rhino_pool
+
 # Main execution
 def main():
     """Run the MCP server"""
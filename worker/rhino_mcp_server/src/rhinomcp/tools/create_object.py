@@ -1,10 +1,11 @@
 from mcp.server.fastmcp import Context
 import json
-from rhinomcp.server import get_rhino_connection, mcp, logger
+from rhinomcp.server import get_async_rhino_connection, mcp, logger
+from rhinomcp.cache import document_cache
 from typing import Any, List, Dict
 
 @mcp.tool()
-def create_object(
+async def create_object(
     ctx: Context,
     type: str = "BOX",
     name: str = None,
@@ -65,7 +66,7 @@ def create_object(
     """
     try:
         # Get the global connection
-        rhino = get_rhino_connection()
+        rhino = await get_async_rhino_connection()
 
         command_params = {
             "type": type,
@@ -80,10 +81,13 @@ def create_object(
         if color: command_params["color"] = color
 
         # Create the object
-        result = result = rhino.send_command("create_object", command_params)  
+        result = await rhino.send_command("create_object", command_params)  
         
         return f"Created {type} object: {result['name']}"
     except Exception as e:
         logger.error(f"Error creating object: {str(e)}")
         return f"Error creating object: {str(e)}"
+    finally:
+        # Name lookups may now resolve to the new object
+        document_cache.invalidate_objects(names=[name])
  
\ No newline at end of file
@@ -1,11 +1,23 @@
 from mcp.server.fastmcp import Context
 import json
-from rhinomcp.server import get_rhino_connection, mcp, logger
-from typing import Any, List, Dict
+import time
+import asyncio
+from rhinomcp.server import get_async_rhino_connection, mcp, logger
+from rhinomcp.cache import document_cache
+from rhinomcp.columnar import expand_batches, expand_create_batch
+from rhinomcp.paging import COMPACT_SEPARATORS
+from typing import Any, List, Dict, Tuple
+
+# Large batches are split into chunks that are sent concurrently
+CHUNK_INITIAL_OBJECTS = 100
+CHUNK_MAX_OBJECTS = 1000
+CHUNK_MAX_BYTES = 512 * 1024
+CHUNK_TARGET_SECONDS = 5.0  # Well under the 15 s socket timeout
+MAX_CHUNKS_IN_FLIGHT = 4
 
 
 @mcp.tool()
-def create_objects(
+async def create_objects(
     ctx: Context,
     objects: List[Dict[str, Any]]
 ) -> str:
@@ -24,8 +36,26 @@ def create_objects(
     - rotation: Optional [x, y, z] rotation in radians
     - scale: Optional [x, y, z] scale factors
 
+    For many points, lines, polylines or curves, pass a columnar batch instead of one dict per object.
+    It describes all objects of one type with a single flat coordinate array:
+    - format: "columnar"
+    - type: "POINT", "LINE", "POLYLINE" or "CURVE"
+    - coordinates: Flat list [x0, y0, z0, x1, y1, z1, ...] of all points, one point per POINT and two per LINE
+    - counts: Number of points of each object, required for POLYLINE and CURVE
+    - encoding: Optional, "f64le-base64" if coordinates is a base64 string of little-endian float64 values
+    - names: Optional list of names, one per object, or name_prefix: a prefix numbered per object
+    - degree: Optional curve degree for CURVE
+    - color, translation, rotation, scale: Optional values shared by all objects in the batch
+    Example: {"format": "columnar", "type": "LINE", "coordinates": [0, 0, 0, 1, 0, 0, 0, 1, 0, 1, 1, 0], "name_prefix": "edge_"}
+    Batches and regular objects can be mixed, results are numbered in the order of the expanded objects.
+
+    Any number of objects can be passed, large batches are sent to Rhino in chunks and
+    progress is reported while they are created. Names do not need to be unique.
+
     Returns:
-    A message indicating the created objects.
+    A JSON object with the number of objects "created" and "failed", the "ids" of the new objects
+    in the same order as the input (null for objects that failed) and the "errors" per failed object.
+    If creation stopped part way, "error" says why and the counts cover what was created until then.
     
     Examples of params:
     [
@@ -71,15 +101,110 @@ def create_objects(
     """
     try:
         # Get the global connection
-        rhino = get_rhino_connection()
-        command_params = {}
-        for obj in objects:
-            command_params[obj["name"]] = obj
-        result = rhino.send_command("create_objects", command_params)
-  
-        
-        return f"Created {len(result)} objects"
+        rhino = await get_async_rhino_connection()
+        objects = expand_batches(objects, expand_create_batch)
+        result = await _create_in_chunks(ctx, rhino, objects)
+        return json.dumps(result, separators=COMPACT_SEPARATORS)
     except Exception as e:
         logger.error(f"Error creating object: {str(e)}")
         return f"Error creating object: {str(e)}"
+    finally:
+        # Name lookups may now resolve to the new objects
+        document_cache.invalidate_objects(names=[obj.get("name") for obj in objects])
+
+
+async def _create_in_chunks(ctx: Context, rhino, objects: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Send the objects to Rhino in pipelined chunks and collect per-object results.
+
+    Chunks are bounded by object count and encoded size. The count adapts to
+    the measured time per object, so a chunk stays well inside the socket
+    timeout however heavy the geometry is.
+    """
+    total = len(objects)
+    ids: List[Any] = [None] * total
+    errors: List[Dict[str, Any]] = []
+    recorded = [False] * total
+    next_index = 0
+    done = 0
+    chunk_limit = CHUNK_INITIAL_OBJECTS
+
+    def take_chunk() -> Tuple[int, int]:
+        nonlocal next_index
+        start = end = next_index
+        size = 0
+        while end < total and end - start < chunk_limit:
+            size += len(json.dumps(objects[end]))
+            if end > start and size > CHUNK_MAX_BYTES:
+                break
+            end += 1
+        next_index = end
+        return start, end
+
+    def record(index: int, entry: Any):
+        recorded[index] = True
+        if isinstance(entry, dict) and entry.get("id") is not None and not entry.get("error"):
+            ids[index] = entry["id"]
+            return
+        if isinstance(entry, dict):
+            message = entry.get("error") or entry.get("message") or "No id returned"
+        else:
+            message = str(entry) if entry is not None else "No result returned"
+        errors.append({"index": index, "name": objects[index].get("name"), "error": message})
+
+    async def worker():
+        nonlocal chunk_limit, done
+        while next_index < total:
+            start, end = take_chunk()
+            # Keys are only used to match results to inputs, so unnamed objects
+            # and objects sharing a name are all created
+            params = {str(index): objects[index] for index in range(start, end)}
+            began = time.monotonic()
+            try:
+                result = await rhino.send_command("create_objects", params)
+                for index in range(start, end):
+                    record(index, result.get(str(index)))
+            except asyncio.CancelledError:
+                for index in range(start, end):
+                    record(index, "Creation stopped while this chunk was sent, the object may have been created")
+                raise
+            except Exception as e:
+                logger.error(f"Error creating objects {start}-{end - 1}: {str(e)}")
+                for index in range(start, end):
+                    record(index, f"Chunk failed, the object may not have been created: {str(e)}")
+
+            per_object = (time.monotonic() - began) / (end - start)
+            if per_object > 0:
+                chunk_limit = max(1, min(CHUNK_MAX_OBJECTS, int(CHUNK_TARGET_SECONDS / per_object)))
+            done += end - start
+            try:
+                await ctx.report_progress(done, total)
+            except Exception as e:
+                # The objects exist either way, losing a progress update must not fail the tool
+                logger.warning(f"Could not report progress: {str(e)}")
+
+    stopped = None
+    workers = [asyncio.ensure_future(worker()) for _ in range(MAX_CHUNKS_IN_FLIGHT)]
+    try:
+        await asyncio.gather(*workers)
+    except Exception as e:
+        logger.error(f"Error creating objects: {str(e)}")
+        stopped = str(e)
+    finally:
+        # Stop the other workers sending chunks and collect their exceptions
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    for index in range(total):
+        if not recorded[index]:
+            record(index, f"Not sent, creation stopped after an error: {stopped}")
 
+    result = {
+        "created": sum(id is not None for id in ids),
+        "failed": len(errors),
+        "ids": ids,
+        "errors": sorted(errors, key=lambda error: error["index"]),
+    }
+    if stopped is not None:
+        result["error"] = stopped
+    return result
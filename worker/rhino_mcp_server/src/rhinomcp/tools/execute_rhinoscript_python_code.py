@@ -1,11 +1,12 @@
 from mcp.server.fastmcp import Context
 import json
-from rhinomcp.server import get_rhino_connection, mcp, logger
+from rhinomcp.server import get_async_rhino_connection, mcp, logger
+from rhinomcp.cache import document_cache
 from typing import Any, List, Dict
 
 
 @mcp.tool()
-def execute_rhinoscript_python_code(ctx: Context, code: str) -> str:
+async def execute_rhinoscript_python_code(ctx: Context, code: str) -> str:
     """
     Execute arbitrary RhinoScript code in Rhino.
     
@@ -45,10 +46,13 @@ def execute_rhinoscript_python_code(ctx: Context, code: str) -> str:
     """
     try:
         # Get the global connection
-        rhino = get_rhino_connection()
+        rhino = await get_async_rhino_connection()
         
-        result = rhino.send_command("execute_rhinoscript_python_code", {"code": code})
+        result = await rhino.send_command("execute_rhinoscript_python_code", {"code": code})
         return f"Code executed successfully: {result.get('result', '')}"
     except Exception as e:
         logger.error(f"Error executing code: {str(e)}")
-        return f"Error executing code: {str(e)}"
\ No newline at end of file
+        return f"Error executing code: {str(e)}"
+    finally:
+        # Arbitrary code can change anything in the document
+        document_cache.invalidate_all()
\ No newline at end of file
@@ -0,0 +1,30 @@
+from mcp.server.fastmcp import Context
+import json
+from rhinomcp import get_async_rhino_connection, mcp, logger
+from rhinomcp.cache import document_cache, document_history
+from rhinomcp.paging import COMPACT_SEPARATORS
+
+@mcp.tool()
+async def get_document_changes(ctx: Context, since_revision: str) -> str:
+    """
+    Get only the objects and layers that were added, modified or deleted since an earlier revision.
+    Much smaller than get_document_info() on large models, use it to refresh your view of the document.
+
+    Parameters:
+    - since_revision: The revision token returned by get_document_info() or a previous get_document_changes() call
+
+    Returns:
+    The new revision token and, for objects and layers, the lists "added" and "modified" (full entries) and "deleted" (ids).
+    If the revision is unknown or too old, call get_document_info() again for a full snapshot.
+    """
+    try:
+        rhino = await get_async_rhino_connection()
+        result = await document_cache.get_document_info(rhino)
+        changes = document_history.changes_since(since_revision, result)
+        if changes is None:
+            return f"Unknown revision {since_revision}, call get_document_info() for a full snapshot"
+
+        return json.dumps(changes, separators=COMPACT_SEPARATORS)
+    except Exception as e:
+        logger.error(f"Error getting document changes from Rhino: {str(e)}")
+        return f"Error getting document changes: {str(e)}"
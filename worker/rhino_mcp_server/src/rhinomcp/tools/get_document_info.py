@@ -1,16 +1,50 @@
 from mcp.server.fastmcp import Context
 import json
-from rhinomcp import get_rhino_connection, mcp, logger
+from rhinomcp import get_async_rhino_connection, mcp, logger
+from rhinomcp.cache import document_cache, document_history
+from rhinomcp.paging import COMPACT_SEPARATORS, page_objects
+from typing import List
 
 @mcp.tool()
-def get_document_info(ctx: Context) -> str:
-    """Get detailed information about the current Rhino document"""
+async def get_document_info(
+    ctx: Context,
+    limit: int = None,
+    cursor: str = None,
+    fields: List[str] = None,
+    layer: str = None,
+    type: str = None,
+) -> str:
+    """
+    Get detailed information about the current Rhino document.
+    The result includes a "revision" token that can be passed to get_document_changes() to fetch only what changed since.
+
+    Objects are returned a page at a time. All parameters are optional:
+    - limit: Maximum number of objects to return (default 500, at most 5000)
+    - cursor: The "next_cursor" of a previous call, to get the next page
+    - fields: Only return these keys of each object, e.g. ["name", "layer"] ("id" is always included)
+    - layer: Only return objects on this layer
+    - type: Only return objects of this type, e.g. "BOX"
+
+    Returns:
+    The document info with the page of "objects", the number of objects that "matched" the filters
+    and "next_cursor", which is null on the last page.
+    """
     try:
-        rhino = get_rhino_connection()
-        result = rhino.send_command("get_document_info")
+        rhino = await get_async_rhino_connection()
+        result = await document_cache.get_document_info(rhino)
+        revision = document_history.record(result)
+        page = page_objects(
+            result.get("objects") or [],
+            revision=revision,
+            limit=limit,
+            cursor=cursor,
+            fields=fields,
+            layer=layer,
+            type=type,
+        )
         
-        # Just return the JSON representation of what Rhino sent us
-        return json.dumps(result, indent=2)
+        # Return what Rhino sent us with the page of objects and the revision token
+        return json.dumps({**result, **page, "revision": revision}, separators=COMPACT_SEPARATORS)
     except Exception as e:
         logger.error(f"Error getting document info from Rhino: {str(e)}")
-        return f"Error getting document info: {str(e)}"
\ No newline at end of file
+        return f"Error getting document info: {str(e)}"
@@ -1,9 +1,11 @@
 from mcp.server.fastmcp import Context
 import json
-from rhinomcp import get_rhino_connection, mcp, logger
+from rhinomcp import get_async_rhino_connection, mcp, logger
+from rhinomcp.cache import document_cache
+from rhinomcp.paging import COMPACT_SEPARATORS
 
 @mcp.tool()
-def get_object_info(ctx: Context, id: str = None, name: str = None) -> str:
+async def get_object_info(ctx: Context, id: str = None, name: str = None) -> str:
     """
     Get detailed information about a specific object in the Rhino document.
     You can either provide the id or the object_name of the object to get information about.
@@ -14,11 +16,11 @@ def get_object_info(ctx: Context, id: str = None, name: str = None) -> str:
     - name: The name of the object to get information about
     """
     try:
-        rhino = get_rhino_connection()
-        result = rhino.send_command("get_object_info", {"id": id, "name": name})
+        rhino = await get_async_rhino_connection()
+        result = await document_cache.get_object_info(rhino, id=id, name=name)
         
         # Just return the JSON representation of what Rhino sent us
-        return json.dumps(result, indent=2)
+        return json.dumps(result, separators=COMPACT_SEPARATORS)
     except Exception as e:
         logger.error(f"Error getting object info from Rhino: {str(e)}")
         return f"Error getting object info: {str(e)}"
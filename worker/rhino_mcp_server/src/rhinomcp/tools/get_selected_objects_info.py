@@ -1,15 +1,57 @@
 from mcp.server.fastmcp import Context
+import hashlib
 import json
-from rhinomcp import get_rhino_connection, mcp, logger
+from rhinomcp import get_async_rhino_connection, mcp, logger
+from rhinomcp.cache import document_cache
+from rhinomcp.paging import COMPACT_SEPARATORS, page_objects
+from typing import Any, Dict, List
+
+
+def selection_revision(objects: List[Dict[str, Any]]) -> str:
+    """Cursor revision that changes with the document and with the selected ids and their order"""
+    digest = hashlib.sha256("\n".join(str(obj.get("id")) for obj in objects).encode("utf-8"))
+    return f"{document_cache.revision}-{digest.hexdigest()[:16]}"
+
 
 @mcp.tool()
-def get_selected_objects_info(ctx: Context) -> str:
-    """Get detailed information about the currently selected objects in Rhino"""
+async def get_selected_objects_info(
+    ctx: Context,
+    limit: int = None,
+    cursor: str = None,
+    fields: List[str] = None,
+    layer: str = None,
+    type: str = None,
+) -> str:
+    """
+    Get detailed information about the currently selected objects in Rhino.
+
+    Objects are returned a page at a time. All parameters are optional:
+    - limit: Maximum number of objects to return (default 500, at most 5000)
+    - cursor: The "next_cursor" of a previous call, to get the next page
+    - fields: Only return these keys of each object, e.g. ["name", "layer"] ("id" is always included)
+    - layer: Only return objects on this layer
+    - type: Only return objects of this type, e.g. "BOX"
+
+    Returns:
+    The page of "objects", the number of selected objects that "matched" the filters
+    and "next_cursor", which is null on the last page.
+    """
     try:
-        rhino = get_rhino_connection()
-        result = rhino.send_command("get_selected_objects_info")
-        return json.dumps(result, indent=2)
+        rhino = await get_async_rhino_connection()
+        result = await rhino.send_command("get_selected_objects_info")
+        objects = result if isinstance(result, list) else result.get("objects") or []
+        page = page_objects(
+            objects,
+            revision=selection_revision(objects),
+            limit=limit,
+            cursor=cursor,
+            fields=fields,
+            layer=layer,
+            type=type,
+        )
+        if isinstance(result, dict):
+            page = {**result, **page}
+        return json.dumps(page, separators=COMPACT_SEPARATORS)
     except Exception as e:
         logger.error(f"Error getting selected objects from Rhino: {str(e)}")
         return f"Error getting selected objects: {str(e)}"
-
@@ -1,11 +1,12 @@
 from mcp.server.fastmcp import Context
 import json
-from rhinomcp.server import get_rhino_connection, mcp, logger
+from rhinomcp.server import get_async_rhino_connection, mcp, logger
+from rhinomcp.cache import document_cache
 from typing import Any, List, Dict
 
 
 @mcp.tool()
-def modify_object(
+async def modify_object(
     ctx: Context,
     id: str = None,
     name: str = None,
@@ -31,7 +32,7 @@ def modify_object(
     """
     try:
         # Get the global connection
-        rhino = get_rhino_connection()
+        rhino = await get_async_rhino_connection()
         
         params : Dict[str, Any] = {}
         
@@ -52,8 +53,10 @@ def modify_object(
         if visible is not None:
             params["visible"] = visible
             
-        result = rhino.send_command("modify_object", params)
+        result = await rhino.send_command("modify_object", params)
         return f"Modified object: {result['name']}"
     except Exception as e:
         logger.error(f"Error modifying object: {str(e)}")
-        return f"Error modifying object: {str(e)}"
\ No newline at end of file
+        return f"Error modifying object: {str(e)}"
+    finally:
+        document_cache.invalidate_objects(ids=[id], names=[name, new_name])
\ No newline at end of file
@@ -1,21 +1,67 @@
 from mcp.server.fastmcp import Context
 import json
-from rhinomcp.server import get_rhino_connection, mcp, logger
-from typing import Any, List, Dict
+import re
+from rhinomcp.server import get_async_rhino_connection, mcp, logger
+from rhinomcp.cache import document_cache
+from rhinomcp.columnar import expand_batches, expand_modify_batch
+from rhinomcp.transforms import Matrix, compose, decode_matrices
+from typing import Any, List, Dict, Optional, Union
+
+# Applies composed matrices with rhinoscriptsyntax when the addon has no native
+# transform command. Filters are matched in the script like select_objects does,
+# without touching the selection. ids and matrices are inlined as JSON, which is
+# valid Python for lists of strings and finite numbers; filters use repr.
+TRANSFORM_SCRIPT = """import rhinoscriptsyntax as rs
+ids = {ids}
+matrices = {matrices}
+filters = {filters}
+match_all = {match_all}
+
+def matches(object_id):
+    checks = []
+    for key, value in filters.items():
+        if key == "name":
+            checks.append(rs.ObjectName(object_id) == value)
+        elif key == "color":
+            color = rs.ObjectColor(object_id)
+            checks.append(color is not None and [color.R, color.G, color.B] == list(value)[:3])
+        else:
+            checks.append(rs.GetUserText(object_id, key) == str(value))
+    if not checks:
+        return True
+    return all(checks) if match_all else any(checks)
+
+if ids is None:
+    ids = [object_id for object_id in rs.AllObjects() or [] if matches(object_id)]
+if not ids:
+    transformed = []
+elif len(matrices) == 1:
+    transformed = rs.TransformObjects(ids, matrices[0]) or []
+else:
+    transformed = [rs.TransformObject(object_id, matrix) for object_id, matrix in zip(ids, matrices)]
+print("transformed=%d" % len([object_id for object_id in transformed if object_id]))
+"""
+TRANSFORM_COUNT = re.compile(r"transformed=(\d+)")
 
 
 @mcp.tool()
-def modify_objects(
+async def modify_objects(
     ctx: Context,
-    objects: List[Dict[str, Any]],
-    all: bool = None
+    objects: List[Dict[str, Any]] = None,
+    all: bool = None,
+    transform: List[Any] = None,
+    matrices: Union[List[Any], str] = None,
+    ids: List[str] = None,
+    filters: Dict[str, Any] = None,
+    filters_type: str = "and",
 ) -> str:
     """
-    Create multiple objects at once in the Rhino document.
+    Modify multiple objects at once in the Rhino document.
     
     Parameters:
     - objects: A List of objects, each containing the parameters for a single object modification 
     - all: Optional boolean to modify all objects, if true, only one object is required in the objects dictionary
+    - transform, matrices, ids, filters, filters_type: Bulk transform, see below
 
     Each object can have the following parameters:
     - id: The id of the object to modify
@@ -25,21 +71,94 @@ def modify_objects(
     - scale: Optional [x, y, z] scale factors
     - visible: Optional boolean to set visibility
 
+    To modify many objects at once, pass a columnar batch instead of one dict per object:
+    - format: "columnar"
+    - ids: List of the ids of the objects to modify
+    - translation, rotation, scale: Optional flat lists [x0, y0, z0, x1, y1, z1, ...] with one vector per id
+    - encoding: Optional, "f64le-base64" if the vectors are base64 strings of little-endian float64 values
+    - new_color, visible: Optional values shared by all objects in the batch
+    Example: {"format": "columnar", "ids": ["id1", "id2"], "translation": [0, 0, 3, 0, 0, 6]}
+
+    To move, rotate or scale many objects in one call, use a bulk transform instead of objects:
+    - transform: One transform applied to every target. Either a 4x4 matrix (row-major, or a flat list of 16 numbers)
+      or a list of steps applied in order, each one of {"translation": [x, y, z]}, {"rotation": [x, y, z]} (radians),
+      {"scale": [x, y, z]} or {"matrix": ...}. Rotation and scale steps take an optional "center": [x, y, z].
+    - matrices: One matrix per id instead of transform, e.g. a twist that grows with height. A list of matrices,
+      a flat list of 16 numbers per object, or that flat list as a base64 string of little-endian float64 values.
+    - ids: The ids of the objects to transform
+    - filters, filters_type: Instead of ids, transform the objects matching these filters (see select_objects())
+    Example: transform=[{"rotation": [0, 0, 0.5], "center": [10, 10, 0]}, {"translation": [0, 0, 3]}], ids=["id1", "id2"]
+
     Returns:
     A message indicating the modified objects.
     """
     try:
         # Get the global connection
-        rhino = get_rhino_connection()
+        rhino = await get_async_rhino_connection()
+        if transform is not None or matrices is not None:
+            if objects or all:
+                raise ValueError("Pass either objects or a bulk transform")
+            return await _transform_objects(rhino, transform, matrices, ids, filters, filters_type)
+
+        objects = expand_batches(objects or [], expand_modify_batch)
         command_params = {}
         command_params["objects"] = objects
         if all:
             command_params["all"] = all
-        result = rhino.send_command("modify_objects", command_params)
+        result = await rhino.send_command("modify_objects", command_params)
   
         
         return f"Modified {result['modified']} objects"
     except Exception as e:
         logger.error(f"Error modifying objects: {str(e)}")
         return f"Error modifying objects: {str(e)}"
+    finally:
+        if all or filters is not None:
+            document_cache.invalidate_all()
+        else:
+            document_cache.invalidate_objects(
+                ids=[obj.get("id") for obj in objects or []] + list(ids or []),
+                names=[obj.get("name") for obj in objects or []]
+            )
+
+
+async def _transform_objects(
+    rhino,
+    transform: Optional[List[Any]],
+    matrices: Optional[Union[List[Any], str]],
+    ids: Optional[List[str]],
+    filters: Optional[Dict[str, Any]],
+    filters_type: str,
+) -> str:
+    """Apply one composed matrix, or one matrix per id, in a single round trip"""
+    if (transform is None) == (matrices is None):
+        raise ValueError("Pass either transform or matrices")
+    if (ids is None) == (filters is None):
+        raise ValueError("Pass either ids or filters")
+
+    xforms: List[Matrix] = [compose(transform)] if transform is not None else decode_matrices(matrices)
+    if len(xforms) > 1 and (ids is None or len(xforms) != len(ids)):
+        raise ValueError("matrices needs ids and exactly one matrix per id")
+
+    if "transform_objects" in rhino.capabilities:
+        params: Dict[str, Any] = {"matrices": xforms}
+        if ids is not None:
+            params["ids"] = ids
+        else:
+            params["filters"] = filters
+            params["filters_type"] = filters_type
+        result = await rhino.send_command("transform_objects", params)
+        return f"Transformed {result.get('transformed', len(ids or []))} objects"
+
+    code = TRANSFORM_SCRIPT.format(
+        ids=json.dumps(ids) if ids is not None else "None",
+        matrices=json.dumps(xforms, allow_nan=False),
+        filters=repr(dict(filters or {})),
+        match_all=filters_type != "or",
+    )
+    result = await rhino.send_command("execute_rhinoscript_python_code", {"code": code})
+    count = TRANSFORM_COUNT.search(str(result.get("result", "")))
+    if count is None:
+        raise Exception(f"Transform script did not report a count: {result.get('result', '')}")
+    return f"Transformed {count.group(1)} objects"
 
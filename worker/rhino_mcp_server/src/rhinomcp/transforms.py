@@ -0,0 +1,109 @@
+"""4x4 transformation matrices for bulk object transforms.
+
+Matrices are row-major nested lists acting on column vectors, the layout
+rhinoscriptsyntax accepts as an xform. Transform steps are composed here, so a
+single matrix (or one matrix per object) is sent to Rhino.
+"""
+import math
+from typing import Any, Dict, List, Sequence
+
+from rhinomcp.columnar import ENCODING_F64LE_BASE64, ENCODING_LIST, decode_array
+
+Matrix = List[List[float]]
+
+
+def identity() -> Matrix:
+    return [[1.0 if row == col else 0.0 for col in range(4)] for row in range(4)]
+
+
+def multiply(a: Matrix, b: Matrix) -> Matrix:
+    """Matrix product a @ b, i.e. b is applied first"""
+    return [[sum(a[row][k] * b[k][col] for k in range(4)) for col in range(4)] for row in range(4)]
+
+
+def translation(vector: Sequence[float]) -> Matrix:
+    matrix = identity()
+    for axis in range(3):
+        matrix[axis][3] = float(vector[axis])
+    return matrix
+
+
+def _about(matrix: Matrix, center: Sequence[float] = None) -> Matrix:
+    """Apply a linear transform about a center point instead of the origin"""
+    if center is None:
+        return matrix
+    return multiply(translation(center), multiply(matrix, translation([-c for c in center])))
+
+
+def scale(factors: Sequence[float], center: Sequence[float] = None) -> Matrix:
+    matrix = identity()
+    for axis in range(3):
+        matrix[axis][axis] = float(factors[axis])
+    return _about(matrix, center)
+
+
+def rotation(angles: Sequence[float], center: Sequence[float] = None) -> Matrix:
+    """Rotation by [x, y, z] angles in radians, about X first, then Y, then Z"""
+    rx, ry, rz = (float(angle) for angle in angles)
+    cx, sx, cy, sy, cz, sz = math.cos(rx), math.sin(rx), math.cos(ry), math.sin(ry), math.cos(rz), math.sin(rz)
+    about_x = [[1, 0, 0, 0], [0, cx, -sx, 0], [0, sx, cx, 0], [0, 0, 0, 1]]
+    about_y = [[cy, 0, sy, 0], [0, 1, 0, 0], [-sy, 0, cy, 0], [0, 0, 0, 1]]
+    about_z = [[cz, -sz, 0, 0], [sz, cz, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]]
+    return _about(multiply(about_z, multiply(about_y, about_x)), center)
+
+
+def as_matrix(value: Sequence[Any]) -> Matrix:
+    """Accept a 4x4 nested list or a flat list of 16 numbers in row-major order"""
+    if len(value) == 16:
+        return [[float(v) for v in value[row * 4:row * 4 + 4]] for row in range(4)]
+    if len(value) == 4 and all(len(row) == 4 for row in value):
+        return [[float(v) for v in row] for row in value]
+    raise ValueError("A matrix must be 4x4 or a flat list of 16 numbers")
+
+
+def check_finite(matrix: Matrix) -> Matrix:
+    """Reject NaN and infinite entries, which Rhino cannot apply"""
+    if not all(math.isfinite(value) for row in matrix for value in row):
+        raise ValueError("Matrix entries must be finite numbers")
+    return matrix
+
+
+def compose(steps: Any) -> Matrix:
+    """Compose a matrix or a list of transform steps, applied in list order.
+
+    Each step is a dict with one of "matrix", "translation", "rotation" or
+    "scale", and an optional "center" for rotation and scale.
+    """
+    if not steps or not isinstance(steps[0], dict):
+        return check_finite(as_matrix(steps))
+
+    result = identity()
+    for step in steps:
+        center = step.get("center")
+        if "matrix" in step:
+            matrix = as_matrix(step["matrix"])
+        elif "translation" in step:
+            matrix = translation(step["translation"])
+        elif "rotation" in step:
+            matrix = rotation(step["rotation"], center)
+        elif "scale" in step:
+            matrix = scale(step["scale"], center)
+        else:
+            raise ValueError(f"Unknown transform step: {step}")
+        result = multiply(matrix, result)
+    return check_finite(result)
+
+
+def decode_matrices(matrices: Any) -> List[Matrix]:
+    """Decode per-object matrices.
+
+    Accepts a list of matrices, a flat list of 16 numbers per matrix, or that
+    flat array as a base64 string of little-endian float64 values.
+    """
+    if isinstance(matrices, str) or (matrices and not isinstance(matrices[0], (list, tuple))):
+        encoding = ENCODING_F64LE_BASE64 if isinstance(matrices, str) else ENCODING_LIST
+        flat = decode_array(matrices, encoding)
+        if len(flat) % 16:
+            raise ValueError(f"Flat matrices must hold a multiple of 16 numbers, got {len(flat)}")
+        return [check_finite(as_matrix(flat[i:i + 16])) for i in range(0, len(flat), 16)]
+    return [check_finite(as_matrix(matrix)) for matrix in matrices]
@@ -1,27 +1,329 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
 from typing import Any
 import httpx
 from mcp.server.fastmcp import FastMCP
 
-# Initialize FastMCP server
-mcp = FastMCP("weather")
-
 # Constants
-NWS_API_BASE = "https://api.weather.gov"
+NWS_API_BASE = os.environ.get("NWS_API_BASE", "https://api.weather.gov")  # Point at a local stub for testing
 USER_AGENT = "weather-app/1.0"
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
 
-async def make_nws_request(url: str) -> dict[str, Any] | None:
-    """Make a request to the NWS API with proper error handling."""
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "application/geo+json"
-    }
-    async with httpx.AsyncClient() as client:
+# Caching: a points lookup always resolves to the same forecast grid, so it is kept for a week
+# (per coordinates rounded to POINTS_PRECISION decimals, ~10 m). Other responses are kept as long
+# as their Cache-Control/Expires headers allow, DEFAULT_TTL seconds without such headers.
+POINTS_PRECISION = 4
+POINTS_TTL = 7 * 24 * 3600
+DEFAULT_TTL = 60.0
+CACHE_MAX_ENTRIES = 256
+CACHE_DIR = os.environ.get("WEATHER_CACHE_DIR")  # Set to keep cached responses across restarts
+CACHE_MAX_STALE = 7 * 24 * 3600  # How long after expiry an entry with validators is kept for revalidation
+
+# Structured output: conversions to SI units and compass points to degrees
+WIND_SPEED_TO_MS = {"mph": 0.44704, "km/h": 1 / 3.6, "kt": 0.514444, "kn": 0.514444, "m/s": 1.0}
+COMPASS_POINTS = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE", "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
+JSON_SEPARATORS = (",", ":")
+
+# Batch requests: locations fetched at once, and requests per second sent to one host
+MAX_CONCURRENT_LOCATIONS = 8
+HOST_RATE_LIMIT = 10.0
+
+class ResponseCache:
+    """LRU of parsed responses with an expiry per entry, optionally backed by a directory of JSON files.
+
+    Expired entries are kept with their ETag/Last-Modified validators, so they can be revalidated
+    with a conditional request and reused, together with anything derived from them, on a 304.
+    Files of entries that can no longer be used are deleted when read and when the cache starts.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, directory: str | None = None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._derived: dict[str, dict[str, Any]] = {}  # key -> name -> value computed from the entry's data
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.prune()
+
+    @staticmethod
+    def usable(entry: dict[str, Any], now: float) -> bool:
+        """Whether an entry is fresh, or expired recently enough to be revalidated."""
+        if entry["expires"] > now:
+            return True
+        return bool(entry.get("etag") or entry.get("last_modified")) and entry["expires"] + CACHE_MAX_STALE > now
+
+    def prune(self):
+        """Delete the files of entries that are no longer usable, and unreadable or partial files."""
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if name.endswith(".json"):
+                    with open(path, encoding="utf-8") as f:
+                        if self.usable(json.load(f), now):
+                            continue
+                os.remove(path)
+            except (OSError, ValueError, KeyError, TypeError):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get_entry(self, key: str) -> dict[str, Any] | None:
+        """The entry for key, expired or not, with keys data, expires, ttl, etag and last_modified."""
+        entry = self._entries.get(key)
+        if entry is None and self.directory:
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                entry = None
+            if entry is not None and not self.usable(entry, time.time()):
+                self.discard(key)
+                entry = None
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, data: Any, ttl: float, etag: str | None = None, last_modified: str | None = None):
+        self._derived.pop(key, None)
+        entry = {"data": data, "expires": time.time() + ttl, "ttl": ttl, "etag": etag, "last_modified": last_modified}
+        self._remember(key, entry)
+        self._write(key, entry)
+
+    def refresh(self, key: str, entry: dict[str, Any], ttl: float):
+        """Extend an entry the server confirmed is still current."""
+        entry["expires"] = time.time() + ttl
+        self._remember(key, entry)
+        self._write(key, entry)
+
+    def discard(self, key: str):
+        """Forget an entry, e.g. when the server no longer allows storing it."""
+        self._entries.pop(key, None)
+        self._derived.pop(key, None)
+        if self.directory:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def derived(self, key: str, data: Any, name: str, compute: Callable[[], Any]) -> Any:
+        """Compute a value from the cached data once, recomputing only when the data changes."""
+        entry = self._entries.get(key)
+        if entry is None or entry["data"] is not data:
+            return compute()
+        values = self._derived.setdefault(key, {})
+        if name not in values:
+            values[name] = compute()
+        return values[name]
+
+    def _write(self, key: str, entry: dict[str, Any]):
+        if self.directory:
+            path = self._path(key)
+            try:
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(entry, f)
+                os.replace(path + ".tmp", path)
+            except OSError:
+                pass
+
+    def _remember(self, key: str, entry: dict[str, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._derived.pop(evicted, None)
+
+response_cache = ResponseCache(directory=CACHE_DIR)
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least 1 / rate seconds apart."""
+
+    def __init__(self, rate: float = HOST_RATE_LIMIT):
+        self.interval = 1.0 / rate
+        self._next_slot: dict[str, float] = {}
+
+    async def wait(self, host: str):
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+rate_limiter = HostRateLimiter()
+
+def cache_directives(response: httpx.Response) -> set[str]:
+    """Names of the Cache-Control directives of a response, in lower case."""
+    cache_control = response.headers.get("Cache-Control", "").lower()
+    return {directive.split("=", 1)[0].strip() for directive in cache_control.split(",")} - {""}
+
+def cache_ttl(response: httpx.Response, default: float = DEFAULT_TTL) -> float:
+    """Seconds a response may be cached according to its Cache-Control and Expires headers."""
+    directives = cache_directives(response)
+    if "no-store" in directives or "no-cache" in directives:
+        return 0.0
+    cache_control = response.headers.get("Cache-Control", "").lower()
+    max_age = re.search(r"(?<![-\w])max-age=(\d+)", cache_control)
+    if max_age:
+        return float(max_age.group(1))
+    expires = response.headers.get("Expires")
+    if expires:
+        try:
+            return max(parsedate_to_datetime(expires).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+    return default
+
+# One client for the whole process so connections (and TLS sessions) are reused between requests
+_http_client: httpx.AsyncClient | None = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None:
         try:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception:
-            return None
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        _http_client = httpx.AsyncClient(
+            http2=http2,
+            limits=HTTP_LIMITS,
+            timeout=HTTP_TIMEOUT,
+            headers={
+                "User-Agent": USER_AGENT,
+                "Accept": "application/geo+json"
+            },
+        )
+    return _http_client
+
+@asynccontextmanager
+async def server_lifespan(server: FastMCP) -> AsyncIterator[dict[str, Any]]:
+    """Open the shared HTTP client on startup and close its connections on shutdown."""
+    global _http_client
+    get_http_client()
+    try:
+        yield {}
+    finally:
+        if _http_client is not None:
+            await _http_client.aclose()
+            _http_client = None
+
+# Initialize FastMCP server
+mcp = FastMCP("weather", lifespan=server_lifespan)
+
+async def make_nws_request(url: str, ttl: float | None = None) -> dict[str, Any] | None:
+    """Make a request to the NWS API with proper error handling.
+
+    Responses are cached for ttl seconds, or as long as the response headers allow when ttl is None.
+    Expired responses that came with an ETag or Last-Modified are revalidated with a conditional
+    request and reused when the server answers 304 Not Modified. Responses marked no-store are
+    never cached, those marked no-cache are cached but revalidated on every use.
+    """
+    entry = response_cache.get_entry(url)
+    if entry is not None and entry["expires"] > time.time():
+        return entry["data"]
+
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    try:
+        await rate_limiter.wait(httpx.URL(url).host)
+        response = await get_http_client().get(url, headers=headers)
+        directives = cache_directives(response)
+        if response.status_code == 304 and entry is not None:
+            # A 304 without caching headers keeps the freshness of the stored response, a no-cache
+            # response was stored without any and must keep being revalidated
+            if ttl is None or "no-cache" in directives or entry.get("ttl") == 0:
+                ttl = cache_ttl(response, default=entry.get("ttl", DEFAULT_TTL))
+            response_cache.refresh(url, entry, ttl)
+            return entry["data"]
+        response.raise_for_status()
+        data = response.json()
+    except Exception:
+        return None
+    if "no-store" in directives:
+        response_cache.discard(url)
+        return data
+    # The server's no-cache overrides our own ttl, the response must be revalidated every time
+    ttl = cache_ttl(response) if ttl is None or "no-cache" in directives else ttl
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if ttl > 0 or etag or last_modified:
+        response_cache.put(url, data, ttl, etag, last_modified)
+    return data
+
+def parse_temperature(value: float | None, unit: str | None) -> float | None:
+    """Temperature in °C."""
+    if value is None:
+        return None
+    if unit == "F":
+        return round((value - 32) * 5 / 9, 1)
+    return float(value)
+
+def parse_wind_speed(text: str | None) -> tuple[float | None, float | None]:
+    """Wind speed range in m/s from NWS text like "5 to 10 mph" or "10 mph"."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)(?:\s*to\s*(\d+(?:\.\d+)?))?\s*(\S+)\s*", text or "")
+    if not match or match.group(3).lower() not in WIND_SPEED_TO_MS:
+        return None, None
+    factor = WIND_SPEED_TO_MS[match.group(3).lower()]
+    low = float(match.group(1)) * factor
+    high = float(match.group(2)) * factor if match.group(2) else low
+    return round(low, 2), round(high, 2)
+
+def parse_wind_direction(text: str | None) -> float | None:
+    """Wind direction in degrees clockwise from north, from a compass point like NW."""
+    if text not in COMPASS_POINTS:
+        return None
+    return COMPASS_POINTS.index(text) * 22.5
+
+def parse_period(period: dict) -> dict[str, Any]:
+    """Convert a forecast period to typed values in SI units."""
+    wind_speed_min, wind_speed_max = parse_wind_speed(period.get("windSpeed"))
+    return {
+        "name": period.get("name"),
+        "start_time": period.get("startTime"),
+        "end_time": period.get("endTime"),
+        "is_daytime": period.get("isDaytime"),
+        "temperature_c": parse_temperature(period.get("temperature"), period.get("temperatureUnit")),
+        "wind_speed_min_ms": wind_speed_min,
+        "wind_speed_max_ms": wind_speed_max,
+        "wind_direction": period.get("windDirection"),
+        "wind_direction_deg": parse_wind_direction(period.get("windDirection")),
+        "precipitation_probability": (period.get("probabilityOfPrecipitation") or {}).get("value"),
+        "short_forecast": period.get("shortForecast"),
+        "detailed_forecast": period.get("detailedForecast"),
+    }
+
+def parse_alert(feature: dict) -> dict[str, Any]:
+    """Convert an alert feature to a flat dictionary."""
+    props = feature["properties"]
+    return {
+        "event": props.get("event"),
+        "area": props.get("areaDesc"),
+        "severity": props.get("severity"),
+        "urgency": props.get("urgency"),
+        "certainty": props.get("certainty"),
+        "onset": props.get("onset"),
+        "expires": props.get("expires"),
+        "description": props.get("description"),
+        "instruction": props.get("instruction"),
+    }
 
 def format_alert(feature: dict) -> str:
     """Format an alert feature into a readable string."""
@@ -35,35 +337,43 @@ Instructions: {props.get('instruction', 'No specific instructions provided')}
 """
 
 @mcp.tool()
-async def get_alerts(state: str) -> str:
+async def get_alerts(state: str, format: str = "text") -> str:
     """Get weather alerts for a US state.
 
     Args:
         state: Two-letter US state code (e.g. CA, NY)
+        format: "text" for a readable summary, "json" for a list of alerts with event, area,
+            severity, urgency, certainty, onset, expires, description and instruction
     """
     url = f"{NWS_API_BASE}/alerts/active/area/{state}"
     data = await make_nws_request(url)
 
     if not data or "features" not in data:
+        if format == "json":
+            return json.dumps({"error": "Unable to fetch alerts or no alerts found."}, separators=JSON_SEPARATORS)
         return "Unable to fetch alerts or no alerts found."
 
+    if format == "json":
+        alerts = response_cache.derived(url, data, "alerts", lambda: [parse_alert(feature) for feature in data["features"]])
+        return json.dumps(alerts, separators=JSON_SEPARATORS)
+
     if not data["features"]:
         return "No active alerts for this state."
 
-    alerts = [format_alert(feature) for feature in data["features"]]
-    return "\n---\n".join(alerts)
+    # Formatted once per version of the alerts, reused while the server reports them unchanged
+    return response_cache.derived(
+        url, data, "text", lambda: "\n---\n".join(format_alert(feature) for feature in data["features"])
+    )
 
-@mcp.tool()
-async def get_forecast(latitude: float, longitude: float) -> str:
-    """Get weather forecast for a location.
+async def fetch_forecast_periods(latitude: float, longitude: float, structured: bool = False) -> list[dict[str, Any]] | str:
+    """Get the forecast periods for a location, or a message saying why they are unavailable.
 
-    Args:
-        latitude: Latitude of the location
-        longitude: Longitude of the location
+    With structured, the periods are parsed by parse_period, once per version of the forecast.
     """
     # First get the forecast grid endpoint
-    points_url = f"{NWS_API_BASE}/points/{latitude},{longitude}"
-    points_data = await make_nws_request(points_url)
+    # Fixed layout, so 40 and 40.0 share one cache entry
+    points_url = f"{NWS_API_BASE}/points/{float(latitude):.{POINTS_PRECISION}f},{float(longitude):.{POINTS_PRECISION}f}"
+    points_data = await make_nws_request(points_url, ttl=POINTS_TTL)
 
     if not points_data:
         return "Unable to fetch forecast data for this location."
@@ -75,8 +385,34 @@ async def get_forecast(latitude: float, longitude: float) -> str:
     if not forecast_data:
         return "Unable to fetch detailed forecast."
 
-    # Format the periods into a readable forecast
     periods = forecast_data["properties"]["periods"]
+    if structured:
+        return response_cache.derived(
+            forecast_url, forecast_data, "periods", lambda: [parse_period(period) for period in periods]
+        )
+    return periods
+
+@mcp.tool()
+async def get_forecast(latitude: float, longitude: float, format: str = "text") -> str:
+    """Get weather forecast for a location.
+
+    Args:
+        latitude: Latitude of the location
+        longitude: Longitude of the location
+        format: "text" for a readable forecast, "json" for the next 5 periods with temperature
+            in °C, wind speed range in m/s, wind direction in degrees and precipitation probability
+    """
+    if format == "json":
+        periods = await fetch_forecast_periods(latitude, longitude, structured=True)
+        if isinstance(periods, str):
+            return json.dumps({"error": periods}, separators=JSON_SEPARATORS)
+        return json.dumps(periods[:5], separators=JSON_SEPARATORS)
+
+    periods = await fetch_forecast_periods(latitude, longitude)
+    if isinstance(periods, str):
+        return periods
+
+    # Format the periods into a readable forecast
     forecasts = []
     for period in periods[:5]:  # Only show next 5 periods
         forecast = f"""
@@ -89,6 +425,48 @@ Forecast: {period['detailedForecast']}
 
     return "\n---\n".join(forecasts)
 
+def invalid_location(location: Any) -> str | None:
+    """Why a get_forecasts location entry is unusable, None when it is fine."""
+    if not isinstance(location, dict):
+        return "Location must be an object with latitude and longitude."
+    for key, bound in (("latitude", 90), ("longitude", 180)):
+        value = location.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return f"Location {key} must be a number."
+        if not -bound <= value <= bound:
+            return f"Location {key} must be between -{bound} and {bound}."
+    return None
+
+@mcp.tool()
+async def get_forecasts(locations: list[Any], periods: int = 5) -> str:
+    """Get weather forecasts for many locations at once, e.g. to compare candidate sites.
+
+    Returns compact JSON with one entry per location, in the given order, holding either
+    its forecast periods (as in get_forecast with format "json") or an error. An invalid location
+    only fails its own entry.
+
+    Args:
+        locations: List of locations, each with latitude and longitude
+        periods: Number of forecast periods per location, at least 1
+    """
+    if periods < 1:
+        raise ValueError("periods must be at least 1")
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_LOCATIONS)
+
+    async def forecast_for(location: Any) -> dict[str, Any]:
+        error = invalid_location(location)
+        if error:
+            return {"location": location, "error": error}
+        latitude, longitude = location["latitude"], location["longitude"]
+        async with semaphore:
+            result = await fetch_forecast_periods(latitude, longitude, structured=True)
+        if isinstance(result, str):
+            return {"latitude": latitude, "longitude": longitude, "error": result}
+        return {"latitude": latitude, "longitude": longitude, "periods": result[:periods]}
+
+    results = await asyncio.gather(*(forecast_for(location) for location in locations))
+    return json.dumps(results, separators=JSON_SEPARATORS)
+
 
 if __name__ == "__main__":
     # Initialize and run the server
@@ -1,4 +1,8 @@
 import asyncio
+import hashlib
+import json
+import os
+import struct
 from typing import Optional
 from contextlib import AsyncExitStack
 
@@ -10,12 +14,60 @@ from dotenv import load_dotenv
 
 load_dotenv()  # load environment variables from .env
 
+# The daemon keeps one MCP session (and the server's Rhino socket) warm between jobs.
+# Jobs talk to it over localhost with length-prefixed JSON frames.
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+FRAME_HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+# Upper bound on Claude calls for one run-agent job
+MAX_AGENT_TURNS = 10
+
+# MCP prompt sent as system prompt of the agent loop, when the server has it
+SYSTEM_PROMPT_NAME = "asset_general_strategy"
+
+# Tool results from before the last COMPACT_KEEP_TURNS turns that are longer than
+# COMPACT_MIN_CHARS are replaced by a short outline to keep later requests small
+COMPACT_KEEP_TURNS = 2
+COMPACT_MIN_CHARS = 2000
+COMPACT_PREVIEW_CHARS = 500
+
+def summarize_tool_result(text: str) -> str:
+    """Outline a large tool result, JSON objects by their keys and list sizes"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        outline = "; ".join(
+            f"{key}: {len(value)} items" if isinstance(value, (list, dict)) else f"{key}: {json.dumps(value)}"
+            for key, value in data.items()
+        )
+    else:
+        outline = text
+    return (f"[Earlier tool result compacted from {len(text)} characters: {outline[:COMPACT_PREVIEW_CHARS]}. "
+            f"Call the tool again if the full result is needed.]")
+
+def compact_tool_results(messages: list, keep_turns: int = COMPACT_KEEP_TURNS):
+    """Replace large text tool results older than the last keep_turns turns by summaries"""
+    tool_turns = [m for m in messages if m['role'] == 'user' and isinstance(m['content'], list)]
+    for message in tool_turns[:max(len(tool_turns) - keep_turns, 0)]:
+        for block in message['content']:
+            content = block.get('content')
+            if isinstance(content, list) and all(item.get('type') == 'text' for item in content):
+                text = "\n".join(item['text'] for item in content)
+                if len(text) > COMPACT_MIN_CHARS:
+                    block['content'] = summarize_tool_result(text)
+
 class MCPClient:
     def __init__(self):
         # Initialize session and client objects
         self.session: Optional[ClientSession] = None
         self.exit_stack = AsyncExitStack()
         self.anthropic = Anthropic()
+        self.server_script_path: Optional[str] = None
+        self.server_info: Optional[dict] = None
 
     async def get_tools(self):
         response = await self.session.list_tools()
@@ -48,16 +100,53 @@ class MCPClient:
         stdio_transport = await self.exit_stack.enter_async_context(stdio_client(server_params))
         self.stdio, self.write = stdio_transport
         self.session = await self.exit_stack.enter_async_context(ClientSession(self.stdio, self.write))
+        self.server_script_path = server_script_path
         
-        await self.session.initialize()
+        init_result = await self.session.initialize()
+        self.server_info = init_result.serverInfo.model_dump(mode='json')
         
         # List available tools
         response = await self.session.list_tools()
         tools = response.tools
         print("\nConnected to server with tools:", [tool.name for tool in tools])
 
+    async def is_alive(self) -> bool:
+        """Check whether the MCP server still answers"""
+        try:
+            await asyncio.wait_for(self.session.send_ping(), 5)
+            return True
+        except Exception:
+            return False
+
+    async def reconnect(self):
+        """Restart the MCP server and open a fresh session"""
+        try:
+            await self.exit_stack.aclose()
+        except Exception as e:
+            # The old server is gone already, closing its transport may fail
+            print(f"Error closing the old MCP session: {e}")
+        self.exit_stack = AsyncExitStack()
+        self.session = None
+        await self.connect_to_server(self.server_script_path)
+
+    async def get_system_prompt(self) -> Optional[str]:
+        """Text of the server's SYSTEM_PROMPT_NAME prompt, None when it has no such prompt"""
+        try:
+            response = await self.session.list_prompts()
+            if not any(prompt.name == SYSTEM_PROMPT_NAME for prompt in response.prompts):
+                return None
+            prompt = await self.session.get_prompt(SYSTEM_PROMPT_NAME)
+        except Exception:
+            return None
+        return "\n".join(message.content.text for message in prompt.messages if message.content.type == 'text')
+
     async def process_query(self, query: str) -> str:
-        """Process a query using Claude and available tools"""
+        """Process a query using Claude and available tools
+
+        Keeps calling Claude and running the tools it asks for until it answers without
+        tool calls, or MAX_AGENT_TURNS is reached. The tool definitions and system prompt are
+        marked for prompt caching, and large results of older turns are compacted.
+        """
         messages = [
             {
                 "role": "user",
@@ -66,88 +155,276 @@ class MCPClient:
         ]
 
         response = await self.session.list_tools()
-        available_tools = [{ 
+        available_tools = [{
             "name": tool.name,
             "description": tool.description,
             "input_schema": tool.inputSchema
         } for tool in response.tools]
+        # Cache breakpoint after the last tool caches all tool definitions
+        if available_tools:
+            available_tools[-1]["cache_control"] = {"type": "ephemeral"}
 
-        # Initial Claude API call
-        response = self.anthropic.messages.create(
+        request = dict(
             model="claude-3-5-sonnet-20241022",
             max_tokens=1000,
-            messages=messages,
             tools=available_tools
         )
+        system_prompt = await self.get_system_prompt()
+        if system_prompt:
+            request["system"] = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
 
-        # Process response and handle tool calls
-        tool_results = []
         final_text = []
 
-        for content in response.content:
-            if content.type == 'text':
-                final_text.append(content.text)
-            elif content.type == 'tool_use':
-                tool_name = content.name
-                tool_args = content.input
-                
-                # Execute tool call
-                result = await self.session.call_tool(tool_name, tool_args)
-                tool_results.append({"call": tool_name, "result": result})
-                final_text.append(f"[Calling tool {tool_name} with args {tool_args}]")
-
-                # Continue conversation with tool results
-                if hasattr(content, 'text') and content.text:
-                    messages.append({
-                      "role": "assistant",
-                      "content": content.text
+        for _ in range(MAX_AGENT_TURNS):
+            compact_tool_results(messages)
+            # Off the event loop, so a daemon keeps serving other jobs meanwhile
+            response = await asyncio.to_thread(self.anthropic.messages.create, messages=messages, **request)
+
+            tool_uses = []
+            for content in response.content:
+                if content.type == 'text':
+                    final_text.append(content.text)
+                elif content.type == 'tool_use':
+                    tool_uses.append(content)
+                    final_text.append(f"\n[Calling tool {content.name} with args {content.input}]\n")
+
+            # Execute the tool calls of this turn concurrently, results go back in one message
+            results = await asyncio.gather(*(
+                self.session.call_tool(content.name, content.input) for content in tool_uses
+            ), return_exceptions=True)
+            tool_results = []
+            for content, result in zip(tool_uses, results):
+                if isinstance(result, Exception):
+                    tool_results.append({
+                        "type": "tool_result",
+                        "tool_use_id": content.id,
+                        "content": str(result),
+                        "is_error": True
+                    })
+                else:
+                    tool_results.append({
+                        "type": "tool_result",
+                        "tool_use_id": content.id,
+                        "content": [item.model_dump(mode='json', exclude={'annotations'}) for item in result.content],
+                        "is_error": result.isError
                     })
-                messages.append({
-                    "role": "user", 
-                    "content": result.content
-                })
 
-                # Get next response from Claude
-                response = self.anthropic.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=1000,
-                    messages=messages,
-                )
+            if not tool_results:
+                break
 
-                final_text.append(response.content[0].text)
+            # Continue conversation with tool results
+            messages.append({
+                "role": "assistant",
+                "content": response.content
+            })
+            messages.append({
+                "role": "user",
+                "content": tool_results
+            })
 
         return "\n".join(final_text)
-    
+
     async def cleanup(self):
         """Clean up resources"""
         await self.exit_stack.aclose()
 
+async def run_batch(client: MCPClient, calls: list) -> dict:
+    """Run a list of tool calls over one session
+
+    Each call is a dict with tool_name, tool_args and optionally an id and depends_on (list of ids).
+    Calls run concurrently as soon as the calls they depend on have finished; a call whose
+    dependency failed is skipped. Results are returned in the order of the calls.
+    """
+    ids = [str(call.get('id', i)) for i, call in enumerate(calls)]
+    if len(set(ids)) != len(ids):
+        raise ValueError("Batch call ids must be unique")
+    depends_on = {id: [str(d) for d in call.get('depends_on', [])] for id, call in zip(ids, calls)}
+    for id, deps in depends_on.items():
+        unknown = [d for d in deps if d not in depends_on]
+        if unknown:
+            raise ValueError(f"Call {id} depends on unknown calls: {unknown}")
+
+    # Refuse cycles up front, they would wait on each other forever
+    visited, visiting = set(), set()
+    def visit(id):
+        if id in visiting:
+            raise ValueError(f"Dependency cycle through call {id}")
+        if id not in visited:
+            visiting.add(id)
+            for d in depends_on[id]:
+                visit(d)
+            visiting.discard(id)
+            visited.add(id)
+    for id in ids:
+        visit(id)
+
+    tasks = {}
+
+    async def run_call(id, call):
+        for d in depends_on[id]:
+            dependency = await tasks[d]
+            if 'error' in dependency or dependency['result'].get('isError'):
+                return {'id': id, 'tool_name': call['tool_name'], 'error': f"Skipped, dependency {d} failed"}
+        try:
+            result = await client.use_tool(call['tool_name'], call.get('tool_args', {}))
+            return {'id': id, 'tool_name': call['tool_name'], 'result': result.model_dump(mode='json')}
+        except Exception as e:
+            return {'id': id, 'tool_name': call['tool_name'], 'error': str(e)}
+
+    for id, call in zip(ids, calls):
+        tasks[id] = asyncio.ensure_future(run_call(id, call))
+    return {'results': list(await asyncio.gather(*tasks.values()))}
+
+async def run_job(client: MCPClient, input_file: dict) -> dict:
+    """Run the job described by an input.json and return the content of output.json"""
+    job = input_file['job']
+
+    if job == 'get-tools':
+        response = await client.get_tools()
+        output = response.model_dump(mode='json')
+        schema_hash = hashlib.sha256(
+            json.dumps(output['tools'], sort_keys=True, separators=(',', ':')).encode('utf-8')
+        ).hexdigest()
+        # Callers holding the current schemas of this server only need to hear they are still valid
+        server = input_file.get('server') or {}
+        same_server = (server.get('name'), server.get('version')) == (
+            client.server_info.get('name'), client.server_info.get('version'))
+        # The system prompt goes along, so callers running their own agent loop use it as well
+        system_prompt = await client.get_system_prompt()
+        if input_file.get('schema_hash') == schema_hash and same_server:
+            return {'not_modified': True, 'schema_hash': schema_hash, 'server': client.server_info,
+                    'system_prompt': system_prompt}
+        output.update(schema_hash=schema_hash, server=client.server_info, system_prompt=system_prompt)
+        return output
+    elif job == 'use-tool':
+        tool_name = input_file['tool_name']
+        tool_args = input_file['tool_args']
+        result = await client.use_tool(tool_name, tool_args)
+        return result.model_dump(mode='json')
+    elif job == 'batch':
+        return await run_batch(client, input_file['calls'])
+    elif job == 'run-agent':
+        answer = await client.process_query(input_file['query'])
+        return {'answer': answer}
+    raise ValueError(f"Unknown job: {job}")
+
+async def read_frame(reader: asyncio.StreamReader) -> dict:
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame of {length} bytes exceeds the maximum of {MAX_FRAME_SIZE}")
+    return json.loads(await reader.readexactly(length))
+
+def encode_frame(payload: dict) -> bytes:
+    body = json.dumps(payload).encode('utf-8')
+    return FRAME_HEADER.pack(len(body)) + body
+
+async def run_daemon(server_script_path: str, port: int = DAEMON_PORT):
+    """Keep an MCP session open and serve jobs from per-job invocations"""
+    client = MCPClient()
+    client.server_script_path = server_script_path
+    server_script = os.path.abspath(server_script_path)
+    reconnects: asyncio.Queue = asyncio.Queue()
+
+    async def own_session():
+        # The stdio transport must be opened and closed by the same task, so a single task
+        # (re)connects on request of the job handlers
+        try:
+            while True:
+                done = await reconnects.get()
+                try:
+                    if client.session is None or not await client.is_alive():
+                        if client.session is not None:
+                            print("MCP server stopped responding, restarting it")
+                        await client.reconnect()
+                    done.set_result(None)
+                except Exception as e:
+                    done.set_exception(e)
+        finally:
+            await client.cleanup()
+
+    async def ensure_connected():
+        done = asyncio.get_running_loop().create_future()
+        reconnects.put_nowait(done)
+        await done
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await read_frame(reader)
+            if os.path.abspath(request['server_script']) != server_script:
+                # Let the caller start the server it asked for itself
+                response = {'unsupported': f"Daemon serves {server_script}, not {request['server_script']}"}
+            else:
+                # Restart a dead server before the job rather than retrying after it, a job that
+                # failed part way may already have changed the Rhino document
+                await ensure_connected()
+                response = {'output': await run_job(client, request['input'])}
+            writer.write(encode_frame(response))
+            await writer.drain()
+        except Exception as e:
+            print(f"Error handling job: {e}")
+            writer.write(encode_frame({'error': str(e)}))
+            await writer.drain()
+        finally:
+            writer.close()
+
+    owner = asyncio.create_task(own_session())
+    try:
+        await ensure_connected()
+        server = await asyncio.start_server(handle, DAEMON_HOST, port)
+        print(f"MCP worker daemon listening on {DAEMON_HOST}:{port}")
+        async with server:
+            await server.serve_forever()
+    finally:
+        owner.cancel()
+        await asyncio.gather(owner, return_exceptions=True)
+
+async def run_via_daemon(server_script_path: str, input_file: dict, port: int = DAEMON_PORT) -> Optional[dict]:
+    """Hand the job to a running daemon, returns None when there is none"""
+    try:
+        reader, writer = await asyncio.open_connection(DAEMON_HOST, port)
+    except OSError:
+        return None
+    try:
+        # Absolute, the daemon may run from another working directory
+        writer.write(encode_frame({'server_script': os.path.abspath(server_script_path), 'input': input_file}))
+        await writer.drain()
+        response = await read_frame(reader)
+    finally:
+        writer.close()
+    if 'unsupported' in response:
+        print(response['unsupported'])
+        return None
+    if 'error' in response:
+        raise RuntimeError(response['error'])
+    return response['output']
+
 async def main():
-    import json
     if len(sys.argv) < 2:
-        print("Usage: python client.py <path_to_server_script> <job>")
+        print("Usage: python client.py <path_to_server_script> [--daemon] [--port <port>]")
         sys.exit(1)
         
-    client = MCPClient()
-    try:
-        await client.connect_to_server(sys.argv[1])
-
-        with open("input.json") as f:
-            input_file = json.load(f)
-        job = input_file['job']
-
-        if job == 'get-tools':
-            response = await client.get_tools()
-            with open('output.json', 'w') as f:
-                json.dump(response.model_dump(mode='json'), f)
-        elif job == 'use-tool':
-            tool_name = input_file['tool_name']
-            tool_args = input_file['tool_args']
-            result = await client.use_tool(tool_name, tool_args)
-            with open('output.json', 'w') as f:
-                json.dump(result.model_dump(mode='json'), f)
-    finally:
-        await client.cleanup()
+    server_script_path = sys.argv[1]
+    port = int(sys.argv[sys.argv.index('--port') + 1]) if '--port' in sys.argv else DAEMON_PORT
+    if '--daemon' in sys.argv:
+        await run_daemon(server_script_path, port)
+        return
+
+    with open("input.json") as f:
+        input_file = json.load(f)
+
+    # Prefer the warm daemon, only start a server of our own when it is not running
+    output = await run_via_daemon(server_script_path, input_file, port)
+    if output is None:
+        client = MCPClient()
+        try:
+            await client.connect_to_server(server_script_path)
+            output = await run_job(client, input_file)
+        finally:
+            await client.cleanup()
+
+    with open('output.json', 'w') as f:
+        json.dump(output, f)
 
 if __name__ == "__main__":
     import sys